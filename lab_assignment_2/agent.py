@@ -1,7 +1,18 @@
 # agent.py
+import time
 import pygame
-from collections import deque
-import heapq
+from anytime import TIME_BUDGET, AnytimePlanner
+from hierarchical import HierarchicalPlanner
+from incremental import DStarLite
+from landmarks import LandmarkIndex
+from pathcache import PathCache
+from search import (SearchResult, SearchStats, TaskIndex, bidirectional_nearest, bucket_search, grid_search,
+                    jump_point_search)
+from tour import TourPlanner
+
+ALGORITHMS = ("ucs", "dial", "astar", "alt", "arastar", "biucs", "biastar", "jps", "dstar", "tour", "hpa")  # Order used by switch_algorithm
+UNCACHED_ALGORITHMS = ("arastar",)  # Results depend on the time budget, not just the layout
+UNIT_COST_ALGORITHMS = ("jps", "dstar", "tour", "hpa")  # Assume every step costs 1; A* plans for them on terrain
 
 class Agent(pygame.sprite.Sprite):
     def __init__(self, environment, grid_size, algorithm="ucs"):
@@ -17,18 +28,34 @@ class Agent(pygame.sprite.Sprite):
         self.completed_tasks = []
         self.path = []  # List of positions to follow
         self.moving = False  # Flag to indicate if the agent is moving
-        self.algorithm = algorithm  # 'ucs' or 'astar'
+        self.algorithm = algorithm  # One of ALGORITHMS
         self.total_path_cost = 0
+        self.last_search = None  # SearchResult of the most recent plan
+        self.path_version = None  # Layout version the current path was planned against
+        self.failed_version = None  # Environment version of the last plan that found no task, else None
+        self.stats = SearchStats()  # Totals over every plan made through find_nearest_task
+        self.search_listeners = []  # Callables invoked with (agent, result) after every plan
+        self.incremental_planner = None  # DStarLite state kept across plans
+        self.tour_planner = None  # TourPlanner with its cached distance matrix
+        self.hierarchical_planner = None  # HierarchicalPlanner index kept across plans
+        self.anytime_planner = None  # AnytimePlanner search state kept across plans
+        self.landmarks = None  # LandmarkIndex for ALT; built on demand or set from mapfile.load_landmarks
+        self.time_budget = TIME_BUDGET  # Seconds an anytime plan may spend refining, None for no limit
+        self.expansion_budget = None  # Expansions an anytime plan may spend refining, None for no limit
+        self.path_cache = PathCache()  # Plans by algorithm, start, tasks and layout version; can be shared
 
     def move(self):
-        """Move the agent along the path."""
+        """Move the agent along the path, stopping instead of stepping onto a barrier."""
+        if self.path and self.environment.blocked[self.environment.cell(*self.path[0])]:
+            # A barrier went up on the path: wait for a new plan
+            self.path = []
         if self.path:
             next_position = self.path.pop(0)
             self.position = list(next_position)
             self.rect.topleft = (self.position[0] * self.grid_size, self.position[1] * self.grid_size)
             self.check_task_completion()
-            # Add movement cost (1 unit per move)
-            self.total_path_cost += 1
+            # Add movement cost (the step cost of the cell moved onto)
+            self.total_path_cost += self.environment.step_cost(*next_position)
         else:
             self.moving = False
 
@@ -37,84 +64,174 @@ class Agent(pygame.sprite.Sprite):
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
 
     def find_nearest_task(self):
-        """Find the nearest task using the selected algorithm."""
+        """Find the nearest task using the selected algorithm and follow the path."""
         if not self.environment.task_locations:
             return
-
-        if self.algorithm == "ucs":
-            self.find_nearest_task_ucs()
+        self.adopt(self.plan())
+
+    def plan(self, start=None):
+        """
+        Search from start (default: the agent's position) with
+        planning_algorithm() and return the timed SearchResult without
+        following it.
+        Repeated queries on an unchanged layout are answered from path_cache.
+        Safe to call from a planning thread while the agent keeps moving.
+        """
+        start = tuple(self.position) if start is None else start
+        started = time.perf_counter()
+        version = self.environment.version
+        layout_version = self.environment.layout_version
+        tasks = self.reachable_tasks(start)
+        algorithm = self.planning_algorithm()
+        cacheable = bool(tasks) and algorithm not in UNCACHED_ALGORITHMS
+        key = (algorithm, start, tuple(tasks), layout_version)
+        cached = self.path_cache.get(key) if cacheable else None
+        if cached is not None:
+            path, goal, cost, bound = cached
+            result = SearchResult(list(path), goal, cost, 0, 0, 0, 0, 0)
+            result.bound = bound
+        elif not tasks:
+            # Every task is walled off: report an empty search instead of flooding the region again
+            result = SearchResult([], None, None, 0, 0)
+        elif algorithm == "ucs":
+            result = self.find_nearest_task_ucs(start)
+        elif algorithm == "dial":
+            result = self.find_nearest_task_dial(start)
+        elif algorithm == "alt":
+            result = self.find_nearest_task_alt(start)
+        elif algorithm == "arastar":
+            result = self.find_nearest_task_arastar(start)
+        elif algorithm == "biucs":
+            result = self.find_nearest_task_bidirectional(start, heuristic=False)
+        elif algorithm == "biastar":
+            result = self.find_nearest_task_bidirectional(start, heuristic=True)
+        elif algorithm == "jps":
+            result = self.find_nearest_task_jps(start)
+        elif algorithm == "dstar":
+            result = self.find_nearest_task_dstar(start)
+        elif algorithm == "tour":
+            result = self.plan_task_tour(start)
+        elif algorithm == "hpa":
+            result = self.find_nearest_task_hpa(start)
         else:  # A* algorithm
-            self.find_nearest_task_astar()
-
-    def find_nearest_task_ucs(self):
+            result = self.find_nearest_task_astar(start)
+        if cacheable and cached is None:
+            # Store an immutable copy; the agent consumes result.path as it moves
+            self.path_cache.put(key, (tuple(result.path), result.goal, result.cost, result.bound))
+        result.elapsed = time.perf_counter() - started
+        result.version = version
+        result.layout_version = layout_version
+        return result
+
+    def planning_algorithm(self):
+        """
+        Return the algorithm plan() runs: the selected one, or A* when the
+        selected one assumes unit steps and the map has costlier terrain,
+        where its paths would not be cheapest and its costs would be wrong.
+        """
+        if self.algorithm in UNIT_COST_ALGORITHMS and self.environment.max_cost > 1:
+            return "astar"
+        return self.algorithm
+
+    def adopt(self, result, approach=()):
+        """
+        Follow a planned result, add it to the stats and tell the search listeners.
+        approach lists the positions still to walk to reach the result's start,
+        for a plan made from a waypoint ahead on the current path.
+        """
+        self._follow(result, approach)
+        self.stats.record(result)
+        for listener in self.search_listeners:
+            listener(self, result)
+
+    def find_nearest_task_ucs(self, start):
         """Find nearest task using Uniform Cost Search."""
-        start = tuple(self.position)
-        # Priority queue stores: (cost, position, path)
-        pq = [(0, start, [start])]
-        visited = set()
-
-        while pq:
-            cost, current, path = heapq.heappop(pq)
-            
-            if current in visited:
-                continue
-                
-            visited.add(current)
-
-            # Check if current position is a task location
-            if current in self.environment.task_locations:
-                self.path = path[1:]  # Exclude the current position
-                self.moving = True
-                return
-
-            # Explore neighbors
-            for next_pos in self.get_neighbors(*current):
-                if next_pos not in visited:
-                    new_path = list(path)
-                    new_path.append(next_pos)
-                    # Cost is uniform (1) for each step
-                    heapq.heappush(pq, (cost + 1, next_pos, new_path))
-
-    def find_nearest_task_astar(self):
-        """Find nearest task using A* Search."""
-        start = tuple(self.position)
-        # For each task, find path using A*
-        best_path = None
-        lowest_cost = float('inf')
-
-        for task_pos in self.environment.task_locations:
-            # Priority queue stores: (f_score, g_score, position, path)
-            pq = [(self.manhattan_distance(start, task_pos), 0, start, [start])]
-            visited = set()
-            g_scores = {start: 0}  # Cost from start to current position
-
-            while pq:
-                f_score, g_score, current, path = heapq.heappop(pq)
-                
-                if current in visited:
-                    continue
-                    
-                visited.add(current)
-
-                if current == task_pos:
-                    if g_score < lowest_cost:
-                        lowest_cost = g_score
-                        best_path = path
-                    break
-
-                for next_pos in self.get_neighbors(*current):
-                    if next_pos not in visited:
-                        new_g_score = g_score + 1
-                        if next_pos not in g_scores or new_g_score < g_scores[next_pos]:
-                            g_scores[next_pos] = new_g_score
-                            new_path = list(path)
-                            new_path.append(next_pos)
-                            f_score = new_g_score + self.manhattan_distance(next_pos, task_pos)
-                            heapq.heappush(pq, (f_score, new_g_score, next_pos, new_path))
-
-        if best_path:
-            self.path = best_path[1:]  # Exclude the current position
+        return grid_search(self.environment, start, self._task_order(start))
+
+    def find_nearest_task_dial(self, start):
+        """Find nearest task using Uniform Cost Search over a bucket queue."""
+        return bucket_search(self.environment, start, self._task_order(start))
+
+    def find_nearest_task_astar(self, start):
+        """Find nearest task using a single multi-goal A* Search."""
+        tasks = TaskIndex(self.reachable_tasks(start))
+        return grid_search(self.environment, start, tasks.order, heuristic=tasks.nearest_distance)
+
+    def find_nearest_task_alt(self, start):
+        """Find nearest task using A* with landmark (ALT) lower bounds, rebuilding them when the layout changed."""
+        if self.landmarks is None or not self.landmarks.is_current(self.environment):
+            self.landmarks = LandmarkIndex(self.environment)
+        tasks = self.reachable_tasks(start)
+        return grid_search(self.environment, start, {pos: order for order, pos in enumerate(tasks)},
+                           heuristic=self.landmarks.heuristic(start, tasks))
+
+    def find_nearest_task_arastar(self, start):
+        """Find nearest task with anytime A* (ARA*), refining a quick inflated-heuristic path within the budget."""
+        if self.anytime_planner is None or self.anytime_planner.environment is not self.environment:
+            self.anytime_planner = AnytimePlanner(self.environment)
+        return self.anytime_planner.plan(start, TaskIndex(self.reachable_tasks(start)),
+                                         self.time_budget, self.expansion_budget)
+
+    def find_nearest_task_bidirectional(self, start, heuristic):
+        """Find nearest task by searching from both ends towards each candidate task."""
+        return bidirectional_nearest(self.environment, start, self._task_order(start), heuristic)
+
+    def find_nearest_task_jps(self, start):
+        """Find nearest task using Jump Point Search."""
+        tasks = TaskIndex(self.reachable_tasks(start))
+        return jump_point_search(self.environment, start, tasks.order, tasks.nearest_distance)
+
+    def find_nearest_task_dstar(self, start):
+        """Find nearest task with D* Lite, repairing the previous search instead of restarting."""
+        planner = self.incremental_planner
+        if planner is None or planner.environment is not self.environment:
+            if planner is not None:
+                planner.detach()
+            planner = self.incremental_planner = DStarLite(self.environment)
+        return planner.plan(start)
+
+    def plan_task_tour(self, start):
+        """Plan a route through every remaining task."""
+        if self.tour_planner is None or self.tour_planner.environment is not self.environment:
+            self.tour_planner = TourPlanner(self.environment)
+        return self.tour_planner.plan(start)
+
+    def find_nearest_task_hpa(self, start):
+        """Find a near-nearest task with hierarchical (HPA*) planning."""
+        planner = self.hierarchical_planner
+        if planner is None or planner.environment is not self.environment:
+            if planner is not None:
+                planner.detach()
+            planner = self.hierarchical_planner = HierarchicalPlanner(self.environment)
+        return planner.plan(start)
+
+    def reachable_tasks(self, start=None):
+        """List the task positions in the region of start (default: the agent's position), in listing order."""
+        environment = self.environment
+        components = environment.components
+        label = components.label(environment.cell(*(self.position if start is None else start)))
+        if label < 0:
+            return []
+        # Iterate a copy: a planning thread may run while the main thread completes tasks
+        return [pos for pos in list(environment.task_locations) if components.label(environment.cell(*pos)) == label]
+
+    def _task_order(self, start):
+        """Map each task position reachable from start to its listing order, used to break distance ties."""
+        return {pos: order for order, pos in enumerate(self.reachable_tasks(start))}
+
+    def _follow(self, result, approach=()):
+        """Adopt the path from a search result and remember its statistics."""
+        self.last_search = result
+        self.path_version = result.layout_version
+        if result.goal is not None:
+            self.path = list(approach) + result.path if approach else result.path
+            self.failed_version = None
             self.moving = True
+        else:
+            # No task is reachable: stop rather than walk an outdated path
+            self.path = []
+            self.failed_version = result.version
+            self.moving = False
 
     def check_task_completion(self):
         """Check if the agent has reached a task location."""
@@ -126,15 +243,13 @@ class Agent(pygame.sprite.Sprite):
 
     def get_neighbors(self, x, y):
         """Get walkable neighboring positions."""
-        neighbors = []
-        directions = [(0, -1), (0, 1), (-1, 0), (1, 0)]  # up, down, left, right
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if self.environment.is_within_bounds(nx, ny) and not self.environment.is_barrier(nx, ny):
-                neighbors.append((nx, ny))
-        return neighbors
+        blocked = self.environment.blocked
+        cell = self.environment.cell(x, y)
+        # Padded cell ids make the border act as a barrier, so no bounds checks are needed
+        return [(x + dx, y + dy) for dx, dy, offset in self.environment.neighbor_steps
+                if not blocked[cell + offset]]
 
     def switch_algorithm(self):
-        """Switch between UCS and A* algorithms."""
-        self.algorithm = "astar" if self.algorithm == "ucs" else "ucs"
+        """Cycle to the next algorithm in ALGORITHMS."""
+        self.algorithm = ALGORITHMS[(ALGORITHMS.index(self.algorithm) + 1) % len(ALGORITHMS)]
         self.total_path_cost = 0  # Reset path cost when switching algorithms
\ No newline at end of file
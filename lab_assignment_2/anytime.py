@@ -0,0 +1,172 @@
+# anytime.py
+import heapq
+import time
+from array import array
+from search import SearchResult, build_path
+
+INFINITY = 2 ** 31 - 1  # Sentinel for unreached cells
+INITIAL_EPSILON = 3.0  # Heuristic inflation of the first, fastest search
+EPSILON_STEP = 0.5  # Inflation removed after each completed search
+TIME_BUDGET = 0.01  # Default seconds one plan() call may spend refining
+TIME_CHECK_INTERVAL = 64  # Expansions between clock reads
+
+
+class AnytimePlanner:
+    """
+    Anytime Repairing A* (ARA*) planner that keeps its search state between calls.
+
+    The first search inflates the heuristic by INITIAL_EPSILON, which
+    finds a path after few expansions. Each later search lowers the
+    inflation by EPSILON_STEP and reuses the g-scores found so far: only
+    cells whose g-score improved after they were expanded (the INCONS
+    list) are opened again, down to epsilon = 1, which is optimal.
+
+    plan() always returns a path as soon as one exists, then keeps
+    refining until its time or expansion budget runs out; a later call
+    from the same start on an unchanged environment resumes where it
+    stopped. Each result carries bound: its cost is at most bound times
+    the optimal cost.
+    """
+
+    def __init__(self, environment, epsilon=INITIAL_EPSILON, epsilon_step=EPSILON_STEP):
+        self.environment = environment
+        self.initial_epsilon = epsilon
+        self.epsilon_step = epsilon_step
+        self.key = None  # (start, environment version) the current search state belongs to
+
+    def _restart(self, start, tasks):
+        """Reset the search state for a new start, layout or task set."""
+        environment = self.environment
+        size = len(environment.blocked)
+        self.key = (start, environment.version)
+        self.start_cell = environment.cell(*start)
+        self.tasks = tasks
+        self.goal_cells = {environment.cell(*pos): order for pos, order in tasks.order.items()}
+        self.g_scores = array('i', [INFINITY]) * size
+        self.parents = array('i', [-1]) * size
+        self.g_scores[self.start_cell] = 0
+        self.epsilon = self.initial_epsilon
+        self.open = {self.start_cell}  # Cells waiting for expansion in the current search
+        self.incons = set()  # Cells improved after expansion, reopened by the next search
+        self.heap = [(self._h(self.start_cell) * self.epsilon, 0, self.start_cell)]
+        self.closed = bytearray(size)
+        self.best = (INFINITY, None, -1)  # (g-score, order, cell) of the best goal reached
+        if self.start_cell in self.goal_cells:
+            self.best = (0, self.goal_cells[self.start_cell], self.start_cell)
+        self.solved = False  # True once the search at the current epsilon completed
+        self.proven = float('inf')  # Epsilon of the last completed search, a bound on the best path
+
+    def _h(self, cell):
+        return self.tasks.nearest_distance(self.environment.position(cell))
+
+    def _next_search(self):
+        """Lower epsilon and rebuild OPEN from OPEN and INCONS with the new keys."""
+        self.epsilon = max(1.0, self.epsilon - self.epsilon_step)
+        self.open |= self.incons
+        self.incons = set()
+        g_scores, epsilon = self.g_scores, self.epsilon
+        self.heap = [(g_scores[cell] + epsilon * self._h(cell), g_scores[cell], cell) for cell in self.open]
+        heapq.heapify(self.heap)
+        self.closed = bytearray(len(self.closed))
+        self.solved = False
+
+    def bound(self):
+        """Suboptimality bound of the best path: its cost is at most this times optimal."""
+        best_g = self.best[0]
+        if best_g >= INFINITY:
+            return None
+        g_scores = self.g_scores
+        # Some cell in OPEN or INCONS lies on an optimal path with its optimal g-score
+        lower = min((g_scores[cell] + self._h(cell) for cell in self.open | self.incons), default=best_g)
+        return max(1.0, min(self.proven, best_g / lower)) if lower else 1.0
+
+    def plan(self, start, tasks, time_budget=TIME_BUDGET, expansion_budget=None):
+        """
+        Return the best path found to the nearest task within the budget.
+
+        Args:
+            start: (x, y) position to plan from
+            tasks: TaskIndex over the goal positions, supplying the
+                heuristic and tie-breaking order
+            time_budget: Seconds to spend refining after the first path, or None
+            expansion_budget: Expansions allowed after the first path, or None
+        Returns:
+            A SearchResult with bound set to the suboptimality bound
+        """
+        environment = self.environment
+        if self.key != (start, environment.version) or self.tasks.order != tasks.order:
+            self._restart(start, tasks)
+        blocked = environment.blocked
+        costs = environment.step_costs
+        offsets = environment.neighbor_offsets
+        g_scores, parents, goal_cells = self.g_scores, self.parents, self.goal_cells
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        nodes_expanded = pushes = pops = stale_pops = 0
+        peak_frontier = len(self.heap)
+
+        while True:
+            if self.solved:
+                if self.epsilon <= 1.0 or self.best[2] < 0:
+                    break  # Optimal, or no task is reachable
+                self._next_search()
+            heap, open_cells, closed, epsilon = self.heap, self.open, self.closed, self.epsilon
+            # The first path is always found; budgets only limit refinement
+            found = self.best[2] >= 0
+            while heap:
+                f_score, g_score, cell = heap[0]
+                if f_score >= self.best[0]:
+                    break
+                if found and (expansion_budget is not None and nodes_expanded >= expansion_budget
+                              or deadline is not None and nodes_expanded % TIME_CHECK_INTERVAL == 0
+                              and time.perf_counter() >= deadline):
+                    return self._result(nodes_expanded, peak_frontier, pushes, pops, stale_pops)
+                heapq.heappop(heap)
+                pops += 1
+                if cell not in open_cells or g_score != g_scores[cell]:
+                    stale_pops += 1
+                    continue
+                open_cells.discard(cell)
+                closed[cell] = 1
+                if cell in goal_cells:
+                    continue  # Goals end paths, like grid_search
+                nodes_expanded += 1
+                for offset in offsets:
+                    next_cell = cell + offset
+                    if blocked[next_cell]:
+                        continue
+                    new_g_score = g_score + costs[next_cell]
+                    if new_g_score >= g_scores[next_cell]:
+                        continue
+                    g_scores[next_cell] = new_g_score
+                    parents[next_cell] = cell
+                    order = goal_cells.get(next_cell)
+                    if order is not None and (new_g_score, order) < self.best[:2]:
+                        self.best = (new_g_score, order, next_cell)
+                        found = True
+                    if closed[next_cell]:
+                        self.incons.add(next_cell)
+                        continue
+                    open_cells.add(next_cell)
+                    heapq.heappush(heap, (new_g_score + epsilon * self._h(next_cell), new_g_score, next_cell))
+                    pushes += 1
+                if len(heap) > peak_frontier:
+                    peak_frontier = len(heap)
+            self.solved = True
+            if self.best[2] >= 0:
+                self.proven = self.epsilon
+
+        return self._result(nodes_expanded, peak_frontier, pushes, pops, stale_pops)
+
+    def _result(self, nodes_expanded, peak_frontier, pushes, pops, stale_pops):
+        environment = self.environment
+        goal_cell = self.best[2]
+        if goal_cell < 0:
+            result = SearchResult([], None, None, nodes_expanded, peak_frontier, pushes, pops, stale_pops)
+        else:
+            path = build_path(environment, self.parents, goal_cell, self.start_cell)
+            # Parents only ever improve, so the path can be cheaper than the goal's recorded g-score
+            cost = sum(environment.step_cost(x, y) for x, y in path)
+            result = SearchResult(path, environment.position(goal_cell), cost, nodes_expanded, peak_frontier,
+                                  pushes, pops, stale_pops)
+        result.bound = self.bound()
+        return result
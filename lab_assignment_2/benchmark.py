@@ -0,0 +1,157 @@
+# benchmark.py
+"""Headless batch simulation: run every planning algorithm on seeded maps and report metrics."""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Agent is a pygame sprite; no window is opened
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # Keep stdout clean for CSV/JSON
+
+from agent import ALGORITHMS, Agent
+from environment import Environment
+
+FIELDS = ["algorithm", "planned_with", "size", "density", "max_cost", "tasks", "seed", "wall_time", "planning_time", "plans",
+          "nodes_expanded", "pushes", "pops", "stale_pops", "cache_hits", "cache_misses", "peak_memory",
+          "total_path_cost", "tasks_completed"]
+
+
+def build_environment(size, density, num_tasks, seed, max_cost=1):
+    """Create a size x size Environment with the given barrier density and step costs, reproducible from seed."""
+    random.seed(seed)
+    return Environment(size, size, 1, num_tasks=num_tasks, num_barriers=int(size * size * density),
+                       max_cost=max_cost)
+
+
+def simulate(environment, algorithm):
+    """Drive one agent until every reachable task is done; its stats hold the search totals."""
+    agent = Agent(environment, 1, algorithm)
+    while environment.task_locations:
+        if not agent.moving:
+            agent.find_nearest_task()
+            if not agent.moving:
+                break  # Nothing reachable is left
+        agent.move()
+    return agent
+
+
+def run_case(algorithm, size, density, num_tasks, seed, measure_memory=True, max_cost=1):
+    """Benchmark one algorithm on one map and return a result row."""
+    environment = build_environment(size, density, num_tasks, seed, max_cost)
+    started = time.perf_counter()
+    agent = simulate(environment, algorithm)
+    stats = agent.stats
+    wall_time = time.perf_counter() - started
+
+    peak_memory = None
+    if measure_memory:
+        # Separate pass: tracemalloc slows allocation-heavy code and would skew the timings
+        environment = build_environment(size, density, num_tasks, seed, max_cost)
+        tracemalloc.start()
+        simulate(environment, algorithm)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "algorithm": algorithm,
+        "planned_with": agent.planning_algorithm(),  # A* for unit-step algorithms on terrain
+        "size": size,
+        "density": density,
+        "max_cost": max_cost,
+        "tasks": num_tasks,
+        "seed": seed,
+        "wall_time": round(wall_time, 6),
+        "planning_time": round(stats.search_time, 6),
+        "plans": stats.searches,
+        "nodes_expanded": stats.nodes_expanded,
+        "pushes": stats.pushes,
+        "pops": stats.pops,
+        "stale_pops": stats.stale_pops,
+        "cache_hits": agent.path_cache.hits,
+        "cache_misses": agent.path_cache.misses,
+        "peak_memory": peak_memory,
+        "total_path_cost": agent.total_path_cost,
+        "tasks_completed": agent.task_completed,
+    }
+
+
+def find_regressions(rows, baseline_rows, tolerance):
+    """Return messages for rows whose planning time or nodes expanded grew beyond tolerance."""
+    key = lambda row: (row["algorithm"], int(row["size"]), float(row["density"]), int(row.get("max_cost", 1)),
+                       int(row["tasks"]), int(row["seed"]))
+    baseline = {key(row): row for row in baseline_rows}
+    messages = []
+    for row in rows:
+        old = baseline.get(key(row))
+        if old is None:
+            continue
+        for metric in ("planning_time", "nodes_expanded", "total_path_cost"):
+            before, after = float(old[metric]), float(row[metric])
+            # Timings under a few milliseconds are mostly noise
+            floor = 0.005 if metric == "planning_time" else 0
+            if after > before * (1 + tolerance) and after - before > floor:
+                messages.append(f"{row['algorithm']} size={row['size']} seed={row['seed']}: "
+                                f"{metric} {before:g} -> {after:g}")
+    return messages
+
+
+def write_rows(rows, output, fmt):
+    if fmt == "json":
+        json.dump(rows, output, indent=2)
+        output.write("\n")
+    else:
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_rows(path):
+    with open(path, newline="") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        return list(csv.DictReader(f))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pathfinding algorithms without a display.")
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=ALGORITHMS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[50, 100], help="Grid side lengths in cells")
+    parser.add_argument("--densities", nargs="+", type=float, default=[0.1, 0.2], help="Fraction of cells that are barriers")
+    parser.add_argument("--max-costs", nargs="+", type=int, default=[1], help="Largest random step cost per map")
+    parser.add_argument("--tasks", type=int, default=20, help="Tasks per map")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0, 1, 2])
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("--output", help="Write results here instead of stdout")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--baseline", help="Earlier CSV/JSON results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for size in args.sizes:
+        for density in args.densities:
+            for max_cost in args.max_costs:
+                for seed in args.seeds:
+                    for algorithm in args.algorithms:
+                        rows.append(run_case(algorithm, size, density, args.tasks, seed, not args.no_memory, max_cost))
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            write_rows(rows, f, args.format)
+    else:
+        write_rows(rows, sys.stdout, args.format)
+
+    if args.baseline:
+        regressions = find_regressions(rows, read_rows(args.baseline), args.tolerance)
+        for message in regressions:
+            print(f"Regression: {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,48 +1,523 @@
+import itertools
 import random
+from array import array
+from collections import deque
+import numpy as np
+
+def label_components(blocked, stride):
+    """
+    Label the 4-connected free regions of a padded grid with a vectorized union-find.
+
+    Every free cell gets the smallest cell id in its region and blocked
+    cells get -1. Each round hooks the larger root of every edge between
+    two trees onto the smaller one, then compresses paths by pointer
+    jumping, so the number of rounds grows with the log of the region size.
+    """
+    free = np.frombuffer(blocked, dtype=np.uint8) == 0
+    parent = np.arange(free.size, dtype=np.intp)
+    horizontal = np.flatnonzero(free[:-1] & free[1:])
+    vertical = np.flatnonzero(free[:-stride] & free[stride:])
+    a = np.concatenate((horizontal, vertical))
+    b = np.concatenate((horizontal + 1, vertical + stride))
+    while len(a):
+        root_a, root_b = parent[a], parent[b]
+        crossing = root_a != root_b
+        if not crossing.any():
+            break
+        a, b = a[crossing], b[crossing]  # Edges inside one tree stay inside it
+        root_a, root_b = root_a[crossing], root_b[crossing]
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    parent[~free] = -1
+    return parent
+
+
+MAX_STEP_COST = 255  # Step costs are stored one byte per cell
+SPLIT_SEARCH_LIMIT = 4096  # Cells a local split check may visit before falling back to re-labelling
+LAYOUT_VERSIONS = itertools.count(1)  # Shared, so no two environments hand out the same layout_version
+
+
+class ComponentIndex:
+    """
+    Connected-region labels for the free cells of an environment.
+
+    label() and connected() answer in O(1) amortized. Opening a barrier
+    merges the regions around it through a union-find over labels. Closing
+    one can only split a region when the free cells around it no longer
+    touch each other around the new barrier; a bounded local search then
+    either reconnects them or relabels the small piece that was cut off,
+    and only otherwise are the labels rebuilt on the next query.
+    """
+
+    def __init__(self, environment):
+        self.environment = environment
+        self.labels = None  # Region label per cell, -1 on blocked cells; None until the next query
+        self.merged = {}  # Label -> label of the region it was merged into
+        self.next_label = 0  # Fresh labels for cells opened with no free neighbors
+        self.relabels = 0  # Full re-labellings so far
+        stride = environment.stride
+        # The eight cells around a cell in ring order; the even entries are its 4-neighbors
+        self.ring = (-stride, -stride + 1, 1, stride + 1, stride, stride - 1, -1, -stride - 1)
+
+    def reset(self):
+        """Forget every label after bulk changes to the barrier bitmap."""
+        self.labels = None
+
+    def _find(self, label):
+        root = label
+        while root in self.merged:
+            root = self.merged[root]
+        while label != root:
+            self.merged[label], label = root, self.merged[label]
+        return root
+
+    def label(self, cell):
+        """Return the region label of a padded-grid cell, or -1 for a blocked cell."""
+        if self.labels is None:
+            environment = self.environment
+            self.labels = label_components(environment.blocked, environment.stride)
+            self.merged = {}
+            self.next_label = len(self.labels)  # Larger than every cell id used as a label
+            self.relabels += 1
+        label = int(self.labels[cell])
+        return self._find(label) if label >= 0 else -1
+
+    def connected(self, cell, other):
+        """True when both cells are free and in the same region."""
+        label = self.label(cell)
+        return label >= 0 and label == self.label(other)
+
+    def _ring_groups(self, cell):
+        """Group the free 4-neighbors of cell that still touch each other through a free corner."""
+        blocked = self.environment.blocked
+        ring = [cell + offset for offset in self.ring]
+        free = [not blocked[other] for other in ring]
+        if all(free):
+            return [ring]
+        if not any(free):
+            return []
+        first = free.index(False)
+        groups, run = [], []
+        for step in range(1, 9):
+            index = (first + step) % 8
+            if free[index]:
+                run.append(index)
+            elif run:
+                groups.append(run)
+                run = []
+        if run:
+            groups.append(run)
+        # A free corner between two blocked neighbors does not touch the cell
+        return [[ring[index] for index in run] for run in groups if any(index % 2 == 0 for index in run)]
+
+    def _resolve_split(self, groups):
+        """
+        Decide locally whether the groups around a new barrier are still connected.
+
+        A bounded search from one group either meets another group, which
+        joins the two, or runs out of cells, in which case that region has
+        split off and gets a fresh label. Returns False when every search hits
+        SPLIT_SEARCH_LIMIT and the labels must be rebuilt.
+        """
+        blocked = self.environment.blocked
+        offsets = self.environment.neighbor_offsets
+        owner = {other: group for group, cells in enumerate(groups) for other in cells}
+        joined = list(range(len(groups)))  # Union-find over the groups
+
+        def find(group):
+            while joined[group] != group:
+                group = joined[group]
+            return group
+
+        open_groups = set(range(len(groups)))
+        while len({find(group) for group in open_groups}) > 1:
+            for group in sorted(open_groups):
+                root = find(group)
+                # Breadth-first, so nearby reconnections are found within the limit
+                seen = {groups[group][0]}
+                frontier = deque(seen)
+                met = None
+                while frontier and met is None and len(seen) <= SPLIT_SEARCH_LIMIT:
+                    current = frontier.popleft()
+                    for offset in offsets:
+                        other = current + offset
+                        if blocked[other] or other in seen:
+                            continue
+                        if other in owner and find(owner[other]) != root:
+                            met = owner[other]
+                            break
+                        seen.add(other)
+                        frontier.append(other)
+                if met is not None:
+                    joined[root] = find(met)
+                    break
+                if not frontier:
+                    # Exhausted: this region is cut off from the other groups
+                    self.labels[list(seen)] = self.next_label
+                    self.next_label += 1
+                    open_groups -= {other for other in open_groups if find(other) == root}
+                    break
+            else:
+                return False  # Every search hit the limit
+        return True
+
+    def barrier_changed(self, cell):
+        """Update the labels after the cell was blocked or opened."""
+        labels = self.labels
+        if labels is None:
+            return
+        blocked = self.environment.blocked
+        if blocked[cell]:
+            if labels[cell] < 0:
+                return
+            labels[cell] = -1
+            groups = self._ring_groups(cell)
+            if len(groups) > 1 and not self._resolve_split(groups):
+                self.labels = None
+        else:
+            if labels[cell] >= 0:
+                return
+            roots = {self._find(int(labels[cell + offset])) for offset in self.ring[0::2]
+                     if not blocked[cell + offset]}
+            if roots:
+                root = min(roots)
+                for other in roots - {root}:
+                    self.merged[other] = root
+            else:
+                root = self.next_label
+                self.next_label += 1
+            labels[cell] = root
+
+
+class BarrierSet(set):
+    """Set of barrier positions that keeps the environment's barrier bitmap in sync."""
+
+    def __init__(self, environment, positions=()):
+        super().__init__()
+        self.environment = environment
+        self.update(positions)
+
+    def add(self, pos):
+        if pos not in self:
+            super().add(pos)
+            self.environment._set_barrier(pos, True)
+
+    def _load(self, positions):
+        """Replace the contents with positions the caller has already written into the barrier bitmap."""
+        super().clear()
+        super().update(positions)
+
+    def discard(self, pos):
+        if pos in self:
+            super().discard(pos)
+            self.environment._set_barrier(pos, False)
+
+    def remove(self, pos):
+        if pos not in self:
+            raise KeyError(pos)
+        self.discard(pos)
+
+    def pop(self):
+        pos = super().pop()
+        self.environment._set_barrier(pos, False)
+        return pos
+
+    def clear(self):
+        for pos in list(self):
+            self.discard(pos)
+
+    def update(self, *others):
+        for other in others:
+            for pos in other:
+                self.add(pos)
+
+    def difference_update(self, *others):
+        for other in others:
+            for pos in other:
+                self.discard(pos)
+
+    def intersection_update(self, *others):
+        self._replace(set(self).intersection(*others))
+
+    def symmetric_difference_update(self, other):
+        self._replace(set(self).symmetric_difference(other))
+
+    def _replace(self, positions):
+        self.difference_update(set(self) - positions)
+        self.update(positions)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
+
+
+class TaskMap(dict):
+    """Dictionary of task positions to task numbers that keeps the task-id map in sync."""
+
+    def __init__(self, environment, tasks=()):
+        super().__init__()
+        self.environment = environment
+        self.update(tasks)
+
+    def __setitem__(self, pos, task_number):
+        super().__setitem__(pos, task_number)
+        self.environment._set_task(pos, task_number)
+
+    def __delitem__(self, pos):
+        super().__delitem__(pos)
+        self.environment._set_task(pos, 0)
+
+    def _load(self, tasks):
+        """Replace the contents with tasks the caller has already written into the task-id map."""
+        super().clear()
+        super().update(tasks)
+
+    def pop(self, pos, *default):
+        if pos not in self:
+            return super().pop(pos, *default)
+        task_number = super().pop(pos)
+        self.environment._set_task(pos, 0)
+        return task_number
+
+    def popitem(self):
+        pos, task_number = super().popitem()
+        self.environment._set_task(pos, 0)
+        return pos, task_number
+
+    def setdefault(self, pos, task_number=None):
+        if pos not in self:
+            self[pos] = task_number
+        return self[pos]
+
+    def clear(self):
+        for pos in list(self):
+            del self[pos]
+
+    def update(self, *args, **kwargs):
+        for pos, task_number in dict(*args, **kwargs).items():
+            self[pos] = task_number
+
 
 class Environment:
-    def __init__(self, width, height, grid_size, num_tasks=5, num_barriers=15):
+    def __init__(self, width, height, grid_size, num_tasks=5, num_barriers=15, max_cost=1):
         self.width = width
         self.height = height
         self.grid_size = grid_size
         self.columns = width // grid_size
         self.rows = height // grid_size
-        
+
+        # Array-backed grid with a one-cell blocked border, so neighbors never need bounds checks.
+        # Cell ids index the padded grid: cell = (y + 1) * stride + (x + 1)
+        self.stride = self.columns + 2
+        size = (self.rows + 2) * self.stride
+        self.blocked = bytearray(b'\x01') * size  # 1 = barrier or border, read in search loops
+        self.task_ids = array('i', [0]) * size  # Task number per cell, 0 = no task
+        self.step_costs = bytearray(b'\x01') * size  # Cost of stepping onto each cell, 1 to MAX_STEP_COST
+        self.max_cost = 1  # Upper bound on every step cost
+        # NumPy views share memory with the buffers above for vectorized work
+        self.barrier_bitmap = np.frombuffer(self.blocked, dtype=np.uint8).reshape(self.rows + 2, self.stride)
+        self.task_grid = np.frombuffer(self.task_ids, dtype=np.intc).reshape(self.rows + 2, self.stride)
+        self.cost_grid = np.frombuffer(self.step_costs, dtype=np.uint8).reshape(self.rows + 2, self.stride)
+        self.barrier_bitmap[1:-1, 1:-1] = 0
+        self.neighbor_offsets = (-self.stride, self.stride, -1, 1)  # up, down, left, right
+        self.neighbor_steps = ((0, -1, -self.stride), (0, 1, self.stride), (-1, 0, -1), (1, 0, 1))
+        # Callables invoked with the position of every barrier, task or step cost change
+        self.change_listeners = []
+        # Bumped on every change, so plans made from an older layout can be recognised as stale
+        self.version = 0
+        # Changes only when barriers or step costs do; keys cached paths and distance fields
+        self.layout_version = next(LAYOUT_VERSIONS)
+        # Region labels for O(1) reachability checks, kept up to date on barrier changes
+        self.components = ComponentIndex(self)
+
         # Dictionary to store task locations and their numbers
-        self.task_locations = {}
+        self.task_locations = TaskMap(self)
         # Set to store barrier locations
-        self.barrier_locations = set()
-        
+        self.barrier_locations = BarrierSet(self)
+
         self._generate_environment(num_tasks, num_barriers)
-    
+        if max_cost > 1:
+            self._generate_terrain(max_cost)
+
     def _generate_environment(self, num_tasks, num_barriers):
-        """Generate random tasks and barriers."""
-        # Generate barriers
-        for _ in range(num_barriers):
-            while True:
-                x = random.randint(0, self.columns - 1)
-                y = random.randint(0, self.rows - 1)
-                # Don't place barriers at (0,0) or if location already has a barrier
-                if (x, y) != (0, 0) and (x, y) not in self.barrier_locations:
-                    self.barrier_locations.add((x, y))
-                    break
-        
-        # Generate tasks
-        task_number = 1
-        for _ in range(num_tasks):
-            while True:
-                x = random.randint(0, self.columns - 1)
-                y = random.randint(0, self.rows - 1)
-                # Don't place tasks at (0,0), on barriers, or where other tasks are
-                if (x, y) != (0, 0) and (x, y) not in self.barrier_locations and (x, y) not in self.task_locations:
-                    self.task_locations[(x, y)] = task_number
-                    task_number += 1
-                    break
-    
+        """
+        Generate random barriers and tasks, with every task reachable from the start.
+
+        Barrier and task cells are drawn without replacement in bulk and
+        written straight into the arrays, so even maps with millions of
+        cells generate quickly. Tasks are only drawn from the start's
+        connected region; when that region is too small, the barriers
+        around it are opened until it has room for every task. The NumPy
+        generator is seeded from the random module, so random.seed() keeps
+        maps reproducible.
+        """
+        if num_tasks <= 0 and num_barriers <= 0:
+            return  # Empty grid, e.g. one about to receive a loaded layout
+        rng = np.random.default_rng(random.getrandbits(64))
+        cells = self.columns * self.rows
+        start = self.cell(0, 0)
+
+        # Barriers anywhere but the start at (0, 0), which is flat index 0
+        num_barriers = max(0, min(num_barriers, cells - 1))
+        picks = rng.choice(cells - 1, num_barriers, replace=False) + 1
+        ys, xs = np.divmod(picks, self.columns)
+        self.barrier_bitmap[ys + 1, xs + 1] = 1
+
+        flat_blocked = self.barrier_bitmap.reshape(-1)
+        while True:
+            labels = label_components(self.blocked, self.stride)
+            region = np.flatnonzero(labels == labels[start])
+            if len(region) > num_tasks:
+                break
+            # Open the barriers bordering the start's region, never the padding
+            around = np.concatenate([region + offset for offset in self.neighbor_offsets])
+            y, x = np.divmod(around, self.stride)
+            around = around[(flat_blocked[around] == 1) & (x >= 1) & (x <= self.columns) & (y >= 1) & (y <= self.rows)]
+            if not len(around):
+                break  # The whole grid is open and still too small
+            flat_blocked[around] = 0
+
+        self._load_barriers()
+        self._add_tasks(region, num_tasks, rng)
+
+    def _generate_terrain(self, max_cost):
+        """Give every cell a random step cost from 1 to max_cost."""
+        if not 1 <= max_cost <= MAX_STEP_COST:
+            raise ValueError(f"max_cost must be between 1 and {MAX_STEP_COST}")
+        rng = np.random.default_rng(random.getrandbits(64))
+        self.cost_grid[1:-1, 1:-1] = rng.integers(1, max_cost + 1, size=(self.rows, self.columns), dtype=np.uint8)
+        self.max_cost = max_cost
+        self.layout_version = next(LAYOUT_VERSIONS)
+
+    def _load_barriers(self):
+        """Rebuild barrier_locations from the barrier bitmap."""
+        ys, xs = np.nonzero(self.barrier_bitmap[1:-1, 1:-1])
+        self.barrier_locations._load(zip(xs.tolist(), ys.tolist()))
+        self.layout_version = next(LAYOUT_VERSIONS)
+
+    def _add_tasks(self, region, num_tasks, rng):
+        """Put up to num_tasks tasks on distinct empty cells of region, numbered after the existing tasks."""
+        region = region[(region != self.cell(0, 0)) & (self.task_grid.reshape(-1)[region] == 0)]
+        task_cells = rng.choice(region, min(num_tasks, len(region)), replace=False)
+        first = max(self.task_locations.values(), default=0) + 1
+        task_numbers = np.arange(first, first + len(task_cells), dtype=np.intc)
+        self.task_grid.reshape(-1)[task_cells] = task_numbers
+        ys, xs = np.divmod(task_cells - self.stride - 1, self.stride)
+        positions = list(zip(xs.tolist(), ys.tolist()))
+        self.task_locations._load({**self.task_locations, **dict(zip(positions, task_numbers.tolist()))})
+        self._notify_all(positions)
+
+    def place_tasks(self, num_tasks):
+        """Add up to num_tasks random tasks on free cells reachable from the start at (0, 0)."""
+        rng = np.random.default_rng(random.getrandbits(64))
+        labels = label_components(self.blocked, self.stride)
+        start = self.cell(0, 0)
+        region = np.flatnonzero(labels == labels[start]) if labels[start] >= 0 else np.empty(0, dtype=np.intp)
+        self._add_tasks(region, num_tasks, rng)
+
+    def load_layout(self, barriers, tasks=None):
+        """
+        Replace every barrier and task at once.
+
+        barriers is a (rows, columns) array whose nonzero cells are barriers,
+        and tasks maps (x, y) positions to task numbers. The arrays are
+        written in bulk and listeners hear about every cell that changed.
+        """
+        barriers = np.asarray(barriers) != 0
+        if barriers.shape != (self.rows, self.columns):
+            raise ValueError(f"Layout is {barriers.shape}, expected {(self.rows, self.columns)}")
+        tasks = dict(tasks or {})
+        interior = self.barrier_bitmap[1:-1, 1:-1]
+        changed = ()
+        if self.change_listeners:
+            ys, xs = np.nonzero(interior != barriers)
+            changed = set(zip(xs.tolist(), ys.tolist())) | set(self.task_locations) | set(tasks)
+        interior[...] = barriers
+        self.task_grid[...] = 0
+        for pos, task_number in tasks.items():
+            if not self.is_within_bounds(*pos):
+                raise ValueError(f"Task {task_number} at {pos} is outside the grid")
+            self.task_ids[self.cell(*pos)] = task_number
+        self._load_barriers()
+        self.components.reset()
+        self.task_locations._load(tasks)
+        self._notify_all(changed)
+
+    def cell(self, x, y):
+        """Return the padded-grid cell id of a position."""
+        return (y + 1) * self.stride + x + 1
+
+    def position(self, cell):
+        """Return the (x, y) position of a padded-grid cell id."""
+        y, x = divmod(cell, self.stride)
+        return (x - 1, y - 1)
+
+    def _set_barrier(self, pos, present):
+        """Mirror a barrier change into the barrier bitmap."""
+        if self.is_within_bounds(*pos):
+            cell = self.cell(*pos)
+            self.blocked[cell] = 1 if present else 0
+            self.layout_version = next(LAYOUT_VERSIONS)
+            self.components.barrier_changed(cell)
+            self._notify(pos)
+
+    def _set_task(self, pos, task_number):
+        """Mirror a task change into the task-id map."""
+        if self.is_within_bounds(*pos):
+            self.task_ids[self.cell(*pos)] = task_number
+            self._notify(pos)
+
+    def _notify(self, pos):
+        """Bump the version and tell every change listener that the cell at pos changed."""
+        self.version += 1
+        for listener in self.change_listeners:
+            listener(pos)
+
+    def step_cost(self, x, y):
+        """Return the cost of stepping onto the given coordinates."""
+        return self.step_costs[self.cell(x, y)]
+
+    def set_step_cost(self, x, y, cost):
+        """Set the cost of stepping onto the given coordinates, an integer from 1 to MAX_STEP_COST."""
+        if not 1 <= cost <= MAX_STEP_COST:
+            raise ValueError(f"Step cost must be between 1 and {MAX_STEP_COST}, got {cost}")
+        if self.is_within_bounds(x, y):
+            self.step_costs[self.cell(x, y)] = cost
+            self.max_cost = max(self.max_cost, cost)
+            self.layout_version = next(LAYOUT_VERSIONS)
+            self._notify((x, y))
+
+    def _notify_all(self, positions):
+        """Bump the version and tell every change listener about each of several changed positions."""
+        self.version += 1
+        if self.change_listeners:
+            for pos in positions:
+                self._notify(pos)
+
     def is_within_bounds(self, x, y):
         """Check if the given coordinates are within the grid bounds."""
         return 0 <= x < self.columns and 0 <= y < self.rows
-    
+
     def is_barrier(self, x, y):
         """Check if the given coordinates contain a barrier."""
-        return (x, y) in self.barrier_locations
\ No newline at end of file
+        return (x, y) in self.barrier_locations
+
+    def is_reachable(self, start, goal):
+        """Check if goal can be reached from start, using the component index."""
+        return self.components.connected(self.cell(*start), self.cell(*goal))
@@ -0,0 +1,354 @@
+# fleet.py
+import heapq
+import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from agent import Agent
+from pathcache import PathCache
+from tour import UNREACHED, distance_field
+
+WAIT = 0  # Offset for staying in place
+FIELD_CACHE_SIZE = 64  # Distance fields kept; raised to the shortlisted task count when more are needed
+CANDIDATE_TASKS = 4  # Open tasks nearest by Manhattan distance that each idle agent chooses from
+MAX_FIELDS_PER_TICK = 16  # Distance fields built per tick at most
+
+
+class Fleet:
+    """
+    Coordinate many agents on one environment with windowed cooperative A*.
+
+    Every tick the fleet
+      1. hands unclaimed tasks to idle agents, nearest pairs first, so no
+         task is ever booked by two agents. Each idle agent only weighs
+         the few open tasks in its region nearest to it by Manhattan
+         distance (candidates), ranked by true distance. Their fields are
+         built lazily, at most max_fields_per_tick a tick, and an agent
+         whose candidates have no field yet waits for the next tick;
+      2. replans up to max_replans_per_tick agents whose reserved path is
+         running out, each with a space-time A* limited to window steps
+         that respects the other agents' reservations;
+      3. advances every agent one step along its reserved path.
+
+    Reservations cover (cell, time) vertices and (from, to, time) edges,
+    so agents neither share a cell nor swap places. An agent at the end of
+    its path rests in its cell, which stays reserved until it replans.
+    The heuristic is the true distance to the goal, from BFS distance
+    fields kept in an LRU cache keyed on the task and the layout version.
+    Per-tick cost is bounded by window, max_replans_per_tick and
+    max_fields_per_tick, not by the fleet size or the task count.
+
+    Only the distance fields are computed in parallel, on a process pool
+    of workers, and only when workers > 1; with the default of 1 no pool
+    is created. The space-time searches stay serial on the calling
+    thread: prioritized planning has each agent search against the
+    reservations of the agents planned before it in the same tick.
+    """
+
+    def __init__(self, environment, agents, window=8, max_replans_per_tick=8, workers=1,
+                 candidates=CANDIDATE_TASKS, max_fields_per_tick=MAX_FIELDS_PER_TICK):
+        positions = [tuple(agent.position) for agent in agents]
+        if len(set(positions)) != len(positions):
+            raise ValueError("Agents in a fleet must start on distinct cells")
+        self.environment = environment
+        self.agents = agents
+        self.window = window
+        self.max_replans_per_tick = max_replans_per_tick
+        self.workers = workers
+        self.candidates = max(1, candidates)
+        self.max_fields_per_tick = max(1, max_fields_per_tick)
+        self.pool = ProcessPoolExecutor(workers) if workers > 1 else None
+        self.time = 0
+        self.goals = [None] * len(agents)  # Task cell booked by each agent
+        self.plans = [[] for _ in agents]  # Cells each agent occupies at time + 1, time + 2, ...
+        self.reserved = {}  # (cell, time) -> agent index
+        self.reserved_edges = set()  # (from_cell, to_cell, time) moves in progress
+        self.reserved_times = {}  # cell -> set of future times it is reserved
+        self.resting = {}  # cell -> (agent index, time the agent settles there)
+        self.owned = [[] for _ in agents]  # Reservation keys held by each agent
+        # (task cell, layout version) -> distance array toward it; room for every agent's shortlist twice over
+        self.fields = PathCache(max(FIELD_CACHE_SIZE, 2 * self.candidates * len(agents)))
+        self.next_priority = 0  # Round-robin start for replanning
+        self.last_replans = 0
+        for index, agent in enumerate(agents):
+            self.resting[environment.cell(*agent.position)] = (index, 0)
+
+    @classmethod
+    def spawn(cls, environment, count, grid_size, algorithm="astar", **kwargs):
+        """Create a fleet of count agents on random free cells (seed with random.seed)."""
+        free = [(x, y) for x in range(environment.columns) for y in range(environment.rows)
+                if (x, y) not in environment.barrier_locations and (x, y) not in environment.task_locations]
+        agents = []
+        for pos in random.sample(free, count):
+            agent = Agent(environment, grid_size, algorithm)
+            agent.position = list(pos)
+            agent.rect.topleft = (pos[0] * grid_size, pos[1] * grid_size)
+            agents.append(agent)
+        return cls(environment, agents, **kwargs)
+
+    def close(self):
+        """Shut down the worker pool."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    # Task assignment
+
+    def _refresh_fields(self, tasks, limit=None):
+        """
+        Return {task: distance field} for the tasks that have one, first
+        computing up to limit missing fields (all when None) in task order,
+        on the worker pool when available.
+        """
+        environment = self.environment
+        version = environment.layout_version
+        self.fields.capacity = max(self.fields.capacity, len(tasks))
+        fields = {task: self.fields.get((task, version)) for task in tasks}
+        missing = [task for task, field in fields.items() if field is None][:limit]
+        if not missing:
+            return {task: field for task, field in fields.items() if field is not None}
+        blocked = bytes(environment.blocked)
+        args = [blocked] * len(missing), [environment.stride] * len(missing), missing
+        results = self.pool.map(distance_field, *args) if self.pool else map(distance_field, *args)
+        for task, packed in zip(missing, results):
+            field = array('i')
+            field.frombytes(packed)
+            fields[task] = field
+            self.fields.put((task, version), field)
+        return {task: field for task, field in fields.items() if field is not None}
+
+    def _assign_tasks(self):
+        """Book unclaimed tasks for idle agents, shortest agent-task distance first."""
+        environment = self.environment
+        tasks = {environment.cell(*pos) for pos in environment.task_locations}
+        for index, goal in enumerate(self.goals):
+            if goal is not None and goal not in tasks:
+                self.goals[index] = None  # Task was completed, possibly by another agent
+        claimed = set(self.goals)
+        open_tasks = [task for task in tasks if task not in claimed]
+        idle = [index for index, goal in enumerate(self.goals) if goal is None]
+        if not open_tasks or not idle:
+            return
+        stride = environment.stride
+        shortlists = {}
+        for index in idle:
+            cell = environment.cell(*self.agents[index].position)
+            y, x = divmod(cell, stride)
+            reachable = [task for task in open_tasks if environment.components.connected(cell, task)]
+            shortlists[index] = heapq.nsmallest(
+                self.candidates, reachable,
+                key=lambda task: abs(task // stride - y) + abs(task % stride - x))
+        # Every agent's nearest candidate is wanted before anyone's second, so capped ticks share fairly
+        wanted = list(dict.fromkeys(shortlist[rank] for rank in range(self.candidates)
+                                    for shortlist in shortlists.values() if rank < len(shortlist)))
+        fields = self._refresh_fields(wanted, self.max_fields_per_tick)
+        pairs = []
+        for index, shortlist in shortlists.items():
+            cell = environment.cell(*self.agents[index].position)
+            for task in shortlist:
+                field = fields.get(task)
+                if field is not None and field[cell] < UNREACHED:
+                    pairs.append((field[cell], index, task))
+        pairs.sort()
+        for _, index, task in pairs:
+            if self.goals[index] is None and task not in claimed:
+                self.goals[index] = task
+                claimed.add(task)
+
+    # Reservations
+
+    def _release(self, index):
+        """Drop every reservation held by an agent."""
+        for key in self.owned[index]:
+            if len(key) == 2:
+                if self.reserved.get(key) == index:
+                    del self.reserved[key]
+                    times = self.reserved_times.get(key[0])
+                    if times is not None:
+                        times.discard(key[1])
+                        if not times:
+                            del self.reserved_times[key[0]]
+            else:
+                self.reserved_edges.discard(key)
+        self.owned[index] = []
+        for cell, (owner, _) in list(self.resting.items()):
+            if owner == index:
+                del self.resting[cell]
+
+    def _reserve(self, index, start_cell, cells):
+        """Reserve a timed path starting now at start_cell, then rest at its last cell."""
+        owned = self.owned[index]
+        previous = start_cell
+        for step, cell in enumerate(cells, start=1):
+            time = self.time + step
+            key = (cell, time)
+            self.reserved[key] = index
+            self.reserved_times.setdefault(cell, set()).add(time)
+            owned.append(key)
+            if cell != previous:
+                edge = (previous, cell, time - 1)
+                self.reserved_edges.add(edge)
+                owned.append(edge)
+            previous = cell
+        self.resting[previous] = (index, self.time + len(cells))
+
+    def _is_free(self, index, cell, time, ignore_idle=False):
+        """True when no other agent occupies cell at time; idle agents' rest spots may be ignored."""
+        owner = self.reserved.get((cell, time))
+        if owner is not None and owner != index:
+            return False
+        rest = self.resting.get(cell)
+        return (rest is None or rest[0] == index or rest[1] > time or
+                (ignore_idle and self.goals[rest[0]] is None))
+
+    def _can_rest(self, index, cell, time):
+        """True when the agent may stop at cell from time on without blocking anyone's plan."""
+        rest = self.resting.get(cell)
+        if rest is not None and rest[0] != index:
+            return False
+        return all(t < time for t in self.reserved_times.get(cell, ()))
+
+    def _snapshot(self, index):
+        """Capture an agent's plan and reservations so they can be restored."""
+        rests = [(cell, rest) for cell, rest in self.resting.items() if rest[0] == index]
+        return list(self.plans[index]), list(self.owned[index]), rests
+
+    def _restore(self, index, snapshot):
+        plan, owned, rests = snapshot
+        self._release(index)
+        self.plans[index] = plan
+        self.owned[index] = owned
+        for key in owned:
+            if len(key) == 2:
+                self.reserved[key] = index
+                self.reserved_times.setdefault(key[0], set()).add(key[1])
+            else:
+                self.reserved_edges.add(key)
+        for cell, rest in rests:
+            self.resting[cell] = rest
+
+    # Planning
+
+    def _search(self, index, ignore_idle):
+        """Space-time A* for one agent over the next window steps; return its timed cells or None."""
+        environment = self.environment
+        blocked = environment.blocked
+        moves = environment.neighbor_offsets + (WAIT,)
+        start = environment.cell(*self.agents[index].position)
+        goal = self.goals[index]
+        field = self.fields.get((goal, environment.layout_version)) if goal is not None else None
+        heuristic = field.__getitem__ if field is not None else (lambda cell: 0)
+        horizon = self.time + self.window
+
+        pq = [(heuristic(start), 0, self.time, start)]
+        parents = {(start, self.time): None}
+        while pq:
+            f_score, g_score, time, cell = heapq.heappop(pq)
+            if (cell == goal or time == horizon) and self._can_rest(index, cell, time):
+                cells = []
+                state = (cell, time)
+                while state[1] > self.time:
+                    cells.append(state[0])
+                    state = parents[state]
+                cells.reverse()
+                return cells
+            if time == horizon:
+                continue
+            for move in moves:
+                next_cell = cell + move
+                if blocked[next_cell] or not self._is_free(index, next_cell, time + 1, ignore_idle):
+                    continue
+                if move != WAIT and (next_cell, cell, time) in self.reserved_edges:
+                    continue  # Would swap places with another agent
+                state = (next_cell, time + 1)
+                if state in parents:
+                    continue
+                parents[state] = (cell, time)
+                # Waiting costs a step too, so agents prefer moving on
+                heapq.heappush(pq, (g_score + 1 + heuristic(next_cell), g_score + 1, time + 1, next_cell))
+        return None
+
+    def _commit(self, index, cells):
+        self.plans[index] = cells
+        self._reserve(index, self.environment.cell(*self.agents[index].position), cells)
+
+    def _plan_agent(self, index):
+        """
+        Plan one agent. Busy agents may route through idle agents' rest
+        spots; those idle agents are then moved out of the way, and if one
+        cannot escape the busy agent plans around them instead.
+        """
+        previous = self._snapshot(index)
+        self._release(index)
+        cells = self._search(index, ignore_idle=True)
+        if cells is None:
+            self._restore(index, previous)
+            return
+        self._commit(index, cells)
+
+        start = self.environment.cell(*self.agents[index].position)
+        displaced = []
+        for time, cell in enumerate(cells, start=self.time + 1):
+            rest = self.resting.get(cell)
+            if rest is not None and rest[0] != index and rest[1] <= time and rest[0] not in displaced:
+                displaced.append(rest[0])
+        saved = {}
+        for other in displaced:
+            saved[other] = self._snapshot(other)
+            self._release(other)
+            escape = self._search(other, ignore_idle=False)
+            if escape is None:
+                for moved, snapshot in saved.items():
+                    self._restore(moved, snapshot)
+                self._release(index)
+                self._commit(index, self._search(index, ignore_idle=False) or [])
+                return
+            self._commit(other, escape)
+
+    def _replan(self):
+        """Replan agents whose reserved path is running out, a bounded number per tick."""
+        count = len(self.agents)
+        replans = 0
+        for offset in range(count):
+            if replans >= self.max_replans_per_tick:
+                break
+            index = (self.next_priority + offset) % count
+            plan = self.plans[index]
+            if self.goals[index] is None:
+                continue  # Idle agents finish their reserved path and rest there
+            if len(plan) <= self.window // 2:
+                self._plan_agent(index)
+                replans += 1
+        self.next_priority = (self.next_priority + replans) % count if count else 0
+        self.last_replans = replans
+
+    def step(self):
+        """Advance the fleet by one tick; return False once every agent is idle with no tasks left."""
+        self._assign_tasks()
+        self._replan()
+        environment = self.environment
+        for index, agent in enumerate(self.agents):
+            plan = self.plans[index]
+            if not plan:
+                continue
+            cell = plan.pop(0)
+            if cell != environment.cell(*agent.position):
+                agent.path = [environment.position(cell)]
+                agent.move()  # Updates rect, path cost and task completion
+        self.time += 1
+        # Forget reservations that are now in the past
+        for key in [key for key in self.reserved if key[1] < self.time]:
+            del self.reserved[key]
+            times = self.reserved_times.get(key[0])
+            if times is not None:
+                times.discard(key[1])
+                if not times:
+                    del self.reserved_times[key[0]]
+        return any(self.plans) or any(goal is not None for goal in self.goals)
+
+    @property
+    def total_path_cost(self):
+        return sum(agent.total_path_cost for agent in self.agents)
+
+    @property
+    def tasks_completed(self):
+        return sum(agent.task_completed for agent in self.agents)
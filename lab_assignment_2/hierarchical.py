@@ -0,0 +1,321 @@
+# hierarchical.py
+import heapq
+import numpy as np
+from search import SearchResult, TaskIndex
+
+INFINITY = 2 ** 31 - 1
+BATCH = 4096  # In-cluster BFS runs processed together by NumPy
+LONG_RUN = 6  # Border runs at least this long get a transition at each end
+
+
+class HierarchicalPlanner:
+    """
+    HPA* planner: plan on a graph of cluster entrances, then refine locally.
+
+    The grid is cut into cluster_size x cluster_size clusters. Wherever two
+    neighboring clusters share a run of open border cells, one transition
+    (two for long runs) links them. Entrances of the same cluster are
+    joined by their in-cluster BFS distance. A query links the start and
+    the tasks to their clusters' entrances, runs A* on this small abstract
+    graph and expands each abstract edge into grid steps inside one
+    cluster. All in-cluster BFS runs are batched through NumPy.
+
+    The index listens to the environment: a barrier change rebuilds only
+    the touched clusters and the borders through that cell, and a task
+    change only drops that task's cached links. Paths are near-optimal;
+    they can be slightly longer than UCS because they pass through
+    entrances.
+    """
+
+    def __init__(self, environment, cluster_size=16):
+        self.environment = environment
+        self.size = cluster_size
+        self.clusters_x = -(-environment.columns // cluster_size)
+        self.clusters_y = -(-environment.rows // cluster_size)
+        # Open-cell mask padded out to whole clusters
+        self.open = np.zeros((self.clusters_y * cluster_size, self.clusters_x * cluster_size), dtype=bool)
+        self.open[:environment.rows, :environment.columns] = environment.barrier_bitmap[1:-1, 1:-1] == 0
+        self.transitions = {}  # Border key -> [(cell in first cluster, cell in second cluster)]
+        self.cluster_nodes = {}  # (cx, cy) -> entrance cells of that cluster
+        self.intra = {}  # Entrance cell -> {entrance cell in the same cluster: distance}
+        self.inter = {}  # Entrance cell -> [entrance cells one step away in a neighboring cluster]
+        self.task_links = {}  # Task cell -> {entrance cell: distance}
+        self.dirty = set()  # Positions changed since the index was last brought up to date
+
+        for cy in range(self.clusters_y):
+            for cx in range(self.clusters_x):
+                if cx + 1 < self.clusters_x:
+                    self._build_border(('v', cx, cy))
+                if cy + 1 < self.clusters_y:
+                    self._build_border(('h', cx, cy))
+        self._build_clusters([(cx, cy) for cy in range(self.clusters_y) for cx in range(self.clusters_x)])
+        environment.change_listeners.append(self.dirty.add)
+
+    def detach(self):
+        """Stop listening to environment changes."""
+        if self.dirty.add in self.environment.change_listeners:
+            self.environment.change_listeners.remove(self.dirty.add)
+
+    def cluster_of(self, cell):
+        x, y = self.environment.position(cell)
+        return (x // self.size, y // self.size)
+
+    # Index construction
+
+    def _build_border(self, key):
+        """Find the transitions across one border and link them in the inter-cluster graph."""
+        for a, b in self.transitions.get(key, ()):
+            self.inter[a].remove(b)
+            self.inter[b].remove(a)
+        kind, cx, cy = key
+        size = self.size
+        if kind == 'v':
+            x = cx * size + size - 1
+            first = range(cy * size, min((cy + 1) * size, self.environment.rows))
+            pairs = [((x, y), (x + 1, y)) for y in first]
+        else:
+            y = cy * size + size - 1
+            first = range(cx * size, min((cx + 1) * size, self.environment.columns))
+            pairs = [((x, y), (x, y + 1)) for x in first]
+
+        # Split the border into runs where both sides are open
+        runs = []
+        run = []
+        for a, b in pairs:
+            if self.open[a[1], a[0]] and self.open[b[1], b[0]]:
+                run.append((a, b))
+            elif run:
+                runs.append(run)
+                run = []
+        if run:
+            runs.append(run)
+
+        cell = self.environment.cell
+        transitions = []
+        for run in runs:
+            chosen = [run[0], run[-1]] if len(run) >= LONG_RUN else [run[len(run) // 2]]
+            for a, b in chosen:
+                a, b = cell(*a), cell(*b)
+                transitions.append((a, b))
+                self.inter.setdefault(a, []).append(b)
+                self.inter.setdefault(b, []).append(a)
+        self.transitions[key] = transitions
+
+    def _cluster_borders(self, cx, cy):
+        """Yield (border key, side) for the four borders of a cluster; side 0 is the first cluster."""
+        yield ('v', cx, cy), 0
+        yield ('v', cx - 1, cy), 1
+        yield ('h', cx, cy), 0
+        yield ('h', cx, cy - 1), 1
+
+    def _build_clusters(self, clusters):
+        """Recompute the entrances of the given clusters and their in-cluster distances."""
+        sources = []
+        for cluster in clusters:
+            for node in self.cluster_nodes.get(cluster, ()):
+                self.intra.pop(node, None)
+            nodes = {}
+            for key, side in self._cluster_borders(*cluster):
+                for transition in self.transitions.get(key, ()):
+                    nodes[transition[side]] = True
+            nodes = list(nodes)
+            self.cluster_nodes[cluster] = nodes
+            sources.extend(nodes)
+
+        local = {cluster: self._local_coordinates(self.cluster_nodes[cluster]) for cluster in clusters}
+        for start in range(0, len(sources), BATCH):
+            batch = sources[start:start + BATCH]
+            for node, field in zip(batch, self._cluster_distances(batch)):
+                nodes = self.cluster_nodes[self.cluster_of(node)]
+                ys, xs = local[self.cluster_of(node)]
+                self.intra[node] = {other: distance for other, distance in zip(nodes, field[ys, xs].tolist())
+                                    if other != node and distance < INFINITY}
+
+    def _local_coordinates(self, cells):
+        """Row and column of each cell inside its cluster, as index arrays."""
+        positions = np.array([self.environment.position(cell) for cell in cells], dtype=np.intp).reshape(-1, 2)
+        return positions[:, 1] % self.size, positions[:, 0] % self.size
+
+    def _cluster_distances(self, cells):
+        """Run one BFS per cell, confined to that cell's cluster; return a (K, size, size) distance array."""
+        size = self.size
+        positions = np.array([self.environment.position(cell) for cell in cells]).reshape(-1, 2)
+        xs, ys = positions[:, 0], positions[:, 1]
+        blocks = self.open.reshape(self.clusters_y, size, self.clusters_x, size).transpose(0, 2, 1, 3)
+        walkable = blocks[ys // size, xs // size]
+        count = len(cells)
+        frontier = np.zeros((count, size, size), dtype=bool)
+        frontier[np.arange(count), ys % size, xs % size] = True
+        reached = frontier.copy()
+        distance = np.full((count, size, size), INFINITY, dtype=np.int32)
+        distance[frontier] = 0
+        level = 0
+        while frontier.any():
+            level += 1
+            grown = np.zeros_like(frontier)
+            grown[:, 1:, :] |= frontier[:, :-1, :]
+            grown[:, :-1, :] |= frontier[:, 1:, :]
+            grown[:, :, 1:] |= frontier[:, :, :-1]
+            grown[:, :, :-1] |= frontier[:, :, 1:]
+            grown &= walkable
+            grown &= ~reached
+            reached |= grown
+            distance[grown] = level
+            frontier = grown
+        return distance
+
+    def _read(self, field, cell):
+        """Look up a cell in a cluster-local distance field."""
+        x, y = self.environment.position(cell)
+        return int(field[y % self.size, x % self.size])
+
+    # Incremental maintenance
+
+    def _apply_changes(self):
+        """Bring the index up to date with barrier and task changes since the last query."""
+        if not self.dirty:
+            return
+        environment = self.environment
+        size = self.size
+        borders = set()
+        clusters = set()
+        # Take a snapshot: listeners may add changes while a planning thread runs this
+        changes = list(self.dirty)
+        self.dirty.difference_update(changes)
+        for x, y in changes:
+            self.task_links.pop(environment.cell(x, y), None)
+            is_open = not environment.blocked[environment.cell(x, y)]
+            if self.open[y, x] == is_open:
+                continue  # Task change only
+            self.open[y, x] = is_open
+            cx, cy = x // size, y // size
+            clusters.add((cx, cy))
+            # Cells on a cluster edge also change the border shared with the neighbor
+            if x % size == size - 1 and cx + 1 < self.clusters_x:
+                borders.add(('v', cx, cy))
+                clusters.add((cx + 1, cy))
+            if x % size == 0 and cx > 0:
+                borders.add(('v', cx - 1, cy))
+                clusters.add((cx - 1, cy))
+            if y % size == size - 1 and cy + 1 < self.clusters_y:
+                borders.add(('h', cx, cy))
+                clusters.add((cx, cy + 1))
+            if y % size == 0 and cy > 0:
+                borders.add(('h', cx, cy - 1))
+                clusters.add((cx, cy - 1))
+        for key in borders:
+            self._build_border(key)
+        if clusters:
+            self._build_clusters(list(clusters))
+            for task in [task for task in self.task_links if self.cluster_of(task) in clusters]:
+                del self.task_links[task]
+
+    # Queries
+
+    def _links(self, cells):
+        """Distances from each cell to the entrances (and tasks) of its own cluster."""
+        tasks_by_cluster = {}
+        for pos in list(self.environment.task_locations):
+            task = self.environment.cell(*pos)
+            tasks_by_cluster.setdefault(self.cluster_of(task), []).append(task)
+        links = []
+        for start in range(0, len(cells), BATCH):
+            batch = cells[start:start + BATCH]
+            for cell, field in zip(batch, self._cluster_distances(batch)):
+                cluster = self.cluster_of(cell)
+                others = self.cluster_nodes[cluster] + tasks_by_cluster.get(cluster, [])
+                ys, xs = self._local_coordinates(others)
+                links.append({other: distance for other, distance in zip(others, field[ys, xs].tolist())
+                              if other != cell and distance < INFINITY})
+        return links
+
+    def _refine(self, source, target):
+        """Grid steps from source to target, which share a cluster or are adjacent."""
+        environment = self.environment
+        if self.cluster_of(source) != self.cluster_of(target):
+            return [environment.position(target)]
+        field = self._cluster_distances([target])[0]
+        path = []
+        cell = source
+        remaining = self._read(field, cell)
+        while cell != target:
+            for offset in environment.neighbor_offsets:
+                step = cell + offset
+                if (not environment.blocked[step] and self.cluster_of(step) == self.cluster_of(target)
+                        and self._read(field, step) == remaining - 1):
+                    cell = step
+                    remaining -= 1
+                    break
+            path.append(environment.position(cell))
+        return path
+
+    def plan(self, start):
+        """Return a SearchResult for the nearest task from start via the abstract graph."""
+        self._apply_changes()
+        environment = self.environment
+        start_cell = environment.cell(*start)
+        # Tasks in other regions can never be reached, so they are not goals
+        tasks = TaskIndex([pos for pos in list(environment.task_locations)
+                           if environment.components.connected(start_cell, environment.cell(*pos))])
+        goal_cells = {environment.cell(*pos): order for pos, order in tasks.order.items()}
+
+        missing = [task for task in goal_cells if task not in self.task_links]
+        for task, links in zip(missing, self._links(missing)):
+            self.task_links[task] = {node: d for node, d in links.items() if node in self.intra}
+        goal_links = {}  # Entrance -> [(task, distance)]
+        for task in goal_cells:
+            for node, distance in self.task_links[task].items():
+                goal_links.setdefault(node, []).append((task, distance))
+        start_links = self._links([start_cell])[0]
+
+        position = environment.position
+        g_scores = {start_cell: 0}
+        parents = {start_cell: None}
+        closed = set()
+        pq = [(tasks.nearest_distance(start), 0, start_cell)]
+        peak_frontier = 1
+        nodes_expanded = 0
+        best_cell, best_cost, best_order = None, INFINITY, None
+        while pq:
+            f_score, g_score, cell = heapq.heappop(pq)
+            if f_score > best_cost:
+                break
+            if cell in closed:
+                continue
+            closed.add(cell)
+            order = goal_cells.get(cell)
+            if order is not None:
+                if best_order is None or order < best_order:
+                    best_cell, best_cost, best_order = cell, g_score, order
+                continue
+            if g_score >= best_cost:
+                continue
+            nodes_expanded += 1
+
+            if cell == start_cell:
+                edges = list(start_links.items())
+            else:
+                edges = list(self.intra.get(cell, {}).items()) + goal_links.get(cell, [])
+            edges += [(other, 1) for other in self.inter.get(cell, ())]
+            for other, cost in edges:
+                new_g_score = g_score + cost
+                if other in closed or new_g_score >= g_scores.get(other, INFINITY):
+                    continue
+                g_scores[other] = new_g_score
+                parents[other] = cell
+                heapq.heappush(pq, (new_g_score + tasks.nearest_distance(position(other)), new_g_score, other))
+            if len(pq) > peak_frontier:
+                peak_frontier = len(pq)
+
+        if best_cell is None:
+            return SearchResult([], None, None, nodes_expanded, peak_frontier)
+        abstract = []
+        cell = best_cell
+        while cell is not None:
+            abstract.append(cell)
+            cell = parents[cell]
+        abstract.reverse()
+        path = []
+        for source, target in zip(abstract, abstract[1:]):
+            path.extend(self._refine(source, target))
+        return SearchResult(path, position(best_cell), best_cost, nodes_expanded, peak_frontier)
@@ -0,0 +1,177 @@
+# incremental.py
+import heapq
+from array import array
+from search import SearchResult
+
+INFINITY = 2 ** 31 - 1  # Sentinel for unreached cells
+
+
+class DStarLite:
+    """
+    D* Lite planner that keeps its search state between calls.
+
+    The search runs backward from every task at once (each task has
+    rhs = 0), so g[cell] is the distance from cell to its nearest task.
+    The planner listens for barrier and task changes on the environment
+    and, on the next plan() call, repairs only the cells whose distances
+    changed. Agent moves are absorbed through the key modifier km.
+
+    Repairs pay off when barriers change around a standing task set: a
+    replan then touches a few cells where A* searches afresh. They do not
+    when the agent collects the task it walked to, which raises g over
+    that task's whole basin. Driving an agent through every task this way
+    (benchmark.py, 200x200 map, 100 tasks) takes 1.5-3x as long as
+    from-scratch A*, so this mode does not beat A* on that workload.
+    """
+
+    def __init__(self, environment):
+        self.environment = environment
+        size = len(environment.blocked)
+        self.g = array('i', [INFINITY]) * size
+        self.rhs = array('i', [INFINITY]) * size
+        self.queue = []  # Heap of (k1, k2, cell); stale entries are skipped
+        self.queued = {}  # cell -> key currently valid for that cell
+        self.km = 0
+        self.last_start = None
+        # Positions changed since the last plan; every task starts out as a fresh goal
+        self.dirty = set(environment.task_locations)
+        environment.change_listeners.append(self.dirty.add)
+
+    def detach(self):
+        """Stop listening to environment changes."""
+        if self.dirty.add in self.environment.change_listeners:
+            self.environment.change_listeners.remove(self.dirty.add)
+
+    def _heuristic(self, cell):
+        """Manhattan distance from the current start cell (consistent for unit steps)."""
+        y, x = divmod(cell, self.environment.stride)
+        return abs(self.start_x - x) + abs(self.start_y - y)
+
+    def _key(self, cell):
+        m = min(self.g[cell], self.rhs[cell])
+        return (m + self._heuristic(cell) + self.km, m)
+
+    def _update_vertex(self, cell):
+        """Recompute rhs of cell from its neighbors and queue the cell if that left it inconsistent."""
+        environment = self.environment
+        g = self.g
+        if environment.blocked[cell]:
+            # Barriers have no edges; neighbors are re-evaluated by the caller
+            g[cell] = self.rhs[cell] = INFINITY
+            self.queued.pop(cell, None)
+            return
+        if environment.task_ids[cell]:
+            rhs = 0
+        else:
+            # Barriers and the padding border keep g = INFINITY, so they never win the min
+            stride = environment.stride
+            rhs = min(g[cell - stride], g[cell + stride], g[cell - 1], g[cell + 1])
+            if rhs < INFINITY:
+                rhs += 1
+        self.rhs[cell] = rhs
+        if g[cell] != rhs:
+            key = self._key(cell)
+            self.queued[cell] = key
+            heapq.heappush(self.queue, (key[0], key[1], cell))
+        else:
+            self.queued.pop(cell, None)
+
+    def _apply_changes(self):
+        """Re-evaluate every cell next to a barrier or task change."""
+        environment = self.environment
+        # Take a snapshot: listeners may add changes while a planning thread runs this
+        changes = list(self.dirty)
+        self.dirty.difference_update(changes)
+        for pos in changes:
+            cell = environment.cell(*pos)
+            self._update_vertex(cell)
+            for offset in environment.neighbor_offsets:
+                if not environment.blocked[cell + offset]:
+                    self._update_vertex(cell + offset)
+
+    def _compute_shortest_path(self):
+        """Process inconsistent cells until the start cell is settled; return expansions, peak heap size, pops and stale pops."""
+        # The hot loop: _update_vertex and _key are inlined on locals, which roughly halves its cost
+        g, rhs, queue, queued = self.g, self.rhs, self.queue, self.queued
+        environment = self.environment
+        blocked, task_ids, stride = environment.blocked, environment.task_ids, environment.stride
+        start, start_x, start_y, km = self.start, self.start_x, self.start_y, self.km
+        heappush, heappop = heapq.heappush, heapq.heappop
+        nodes_expanded = 0
+        pops = stale_pops = 0
+        peak_frontier = len(queue)
+        while queue:
+            k1, k2, cell = queue[0]
+            if queued.get(cell) != (k1, k2):
+                heappop(queue)  # Stale entry
+                pops += 1
+                stale_pops += 1
+                continue
+            m = min(g[start], rhs[start])
+            if (k1, k2) >= (m + km, m) and rhs[start] == g[start]:
+                break
+            heappop(queue)
+            pops += 1
+            m = min(g[cell], rhs[cell])
+            y, x = divmod(cell, stride)
+            new_key = (m + abs(start_x - x) + abs(start_y - y) + km, m)
+            if (k1, k2) < new_key:
+                queued[cell] = new_key
+                heappush(queue, (new_key[0], new_key[1], cell))
+                continue
+            del queued[cell]
+            nodes_expanded += 1
+            if g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]
+                changed = (cell - stride, cell + stride, cell - 1, cell + 1)
+            else:
+                g[cell] = INFINITY
+                changed = (cell, cell - stride, cell + stride, cell - 1, cell + 1)
+            for neighbor in changed:
+                if blocked[neighbor]:
+                    continue
+                # Inlined _update_vertex
+                if task_ids[neighbor]:
+                    value = 0
+                else:
+                    value = min(g[neighbor - stride], g[neighbor + stride], g[neighbor - 1], g[neighbor + 1])
+                    if value < INFINITY:
+                        value += 1
+                rhs[neighbor] = value
+                if g[neighbor] != value:
+                    m = value if value < g[neighbor] else g[neighbor]
+                    y, x = divmod(neighbor, stride)
+                    k1 = m + abs(start_x - x) + abs(start_y - y) + km
+                    queued[neighbor] = (k1, m)
+                    heappush(queue, (k1, m, neighbor))
+                else:
+                    queued.pop(neighbor, None)
+            if len(queue) > peak_frontier:
+                peak_frontier = len(queue)
+        return nodes_expanded, peak_frontier, pops, stale_pops
+
+    def plan(self, start):
+        """Return a SearchResult for the nearest task from start, reusing earlier work."""
+        environment = self.environment
+        self.start = environment.cell(*start)
+        self.start_y, self.start_x = divmod(self.start, environment.stride)
+        if self.last_start is not None and self.last_start != self.start:
+            # Moving the start lowers every heuristic by at most this much
+            self.km += self._heuristic(self.last_start)
+        self.last_start = self.start
+        queued_before = len(self.queue)
+        self._apply_changes()
+        nodes_expanded, peak_frontier, pops, stale_pops = self._compute_shortest_path()
+        counters = (pops + len(self.queue) - queued_before, pops, stale_pops)  # Pushes, pops, stale pops
+
+        cell = self.start
+        cost = self.g[cell]
+        if cost >= INFINITY:
+            return SearchResult([], None, None, nodes_expanded, peak_frontier, *counters)
+        # Walk downhill on g from the start to a task
+        path = []
+        g = self.g
+        while not environment.task_ids[cell]:
+            cell = min((cell + offset for offset in environment.neighbor_offsets), key=g.__getitem__)
+            path.append(environment.position(cell))
+        return SearchResult(path, environment.position(cell), cost, nodes_expanded, peak_frontier, *counters)
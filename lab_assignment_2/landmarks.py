@@ -0,0 +1,143 @@
+# landmarks.py
+import numpy as np
+from environment import label_components
+
+LANDMARK_COUNT = 8  # Distance fields built per layout
+ACTIVE_LANDMARKS = 3  # Landmarks consulted per task, the ones that bound the start's distance best
+
+
+def cost_field(blocked, step_costs, stride, source):
+    """
+    Cheapest cost from source to every cell of a padded grid.
+
+    Stepping onto a cell costs its step cost. Cells are settled one cost
+    level at a time with NumPy, like a bucket queue, so unit-cost grids
+    take one pass per BFS level. Returns an int64 array indexed by cell
+    id, with -1 where source cannot reach.
+    """
+    walls = np.frombuffer(blocked, dtype=np.uint8) != 0
+    costs = np.frombuffer(step_costs, dtype=np.uint8).astype(np.int64)
+    offsets = np.array([-stride, stride, -1, 1])
+    unreached = np.iinfo(np.int64).max
+    distance = np.full(len(walls), unreached, dtype=np.int64)
+    distance[source] = 0
+    buckets = {0: [np.array([source])]}
+    while buckets:
+        level = min(buckets)
+        cells = np.unique(np.concatenate(buckets.pop(level)))
+        cells = cells[distance[cells] == level]  # Drop cells re-queued at a lower cost
+        neighbors = (cells[None, :] + offsets[:, None]).ravel()
+        neighbors = neighbors[~walls[neighbors]]
+        new = level + costs[neighbors]
+        better = new < distance[neighbors]
+        neighbors, new = neighbors[better], new[better]
+        np.minimum.at(distance, neighbors, new)
+        winning = new == distance[neighbors]
+        neighbors, new = neighbors[winning], new[winning]
+        for value in np.unique(new).tolist():
+            buckets.setdefault(value, []).append(neighbors[new == value])
+    distance[distance == unreached] = -1
+    return distance
+
+
+class LandmarkIndex:
+    """
+    ALT (A*, landmarks and the triangle inequality) lower bounds for an environment.
+
+    A few landmark cells are spread over the largest region by repeatedly
+    taking the cell farthest from those chosen so far, and the cost from
+    each landmark to every cell is stored in one compact array per
+    landmark (uint16 when the costs fit, else uint32). For a landmark L,
+    a cell v and a task t,
+        d(L, t) - d(L, v)  and  d(L, v) - d(L, t) + cost(t) - cost(v)
+    are both lower bounds on the cost from v to t (the second reverses
+    the paths, which swaps whose step cost is paid). The tables hold for
+    one layout; is_current() tells when barriers or step costs changed.
+    """
+
+    def __init__(self, environment, count=LANDMARK_COUNT, landmarks=None, fields=None):
+        """
+        Args:
+            environment: Environment to index
+            count: Landmarks to place when none are given
+            landmarks: Precomputed landmark cell ids, as saved by save_landmarks
+            fields: Precomputed (landmarks, cells) cost array matching landmarks
+        """
+        self.environment = environment
+        self.layout_version = environment.layout_version
+        if fields is None:
+            landmarks, fields = self._build(count)
+        self.landmarks = [int(cell) for cell in landmarks]
+        self.fields = fields
+        self.unreached = np.iinfo(fields.dtype).max
+        # Memoryviews index like arrays and return plain ints, which keeps the heuristic loop cheap
+        self.views = [memoryview(field) for field in fields]
+
+    def _build(self, count):
+        environment = self.environment
+        blocked, stride = environment.blocked, environment.stride
+        labels = label_components(blocked, stride)
+        free = labels >= 0
+        if not free.any() or count <= 0:
+            return [], np.empty((0, len(blocked)), dtype=np.uint16)
+        region = labels == np.bincount(labels[free]).argmax()
+        # The first landmark is the cell farthest from an arbitrary one, each later one the farthest from all so far
+        nearest = cost_field(blocked, environment.step_costs, stride, int(np.flatnonzero(region)[0]))
+        landmarks, fields = [], []
+        for _ in range(min(count, int(region.sum()))):
+            cell = int(np.argmax(np.where(region, nearest, -1)))
+            if landmarks and nearest[cell] <= 0:
+                break  # Every cell of the region is already a landmark
+            field = cost_field(blocked, environment.step_costs, stride, cell)
+            nearest = np.minimum(nearest, field) if landmarks else field
+            landmarks.append(cell)
+            fields.append(field)
+        fields = np.stack(fields)
+        dtype = np.uint16 if fields.max() < np.iinfo(np.uint16).max else np.uint32
+        fields[fields < 0] = np.iinfo(dtype).max
+        return landmarks, fields.astype(dtype)
+
+    def is_current(self, environment):
+        """Return True if the tables were built for this environment's current layout."""
+        return environment is self.environment and environment.layout_version == self.layout_version
+
+    def heuristic(self, start, tasks):
+        """
+        Return a heuristic for A* from start towards the nearest of tasks.
+
+        The heuristic takes a position and returns the largest landmark
+        or Manhattan lower bound to each task, minimized over the tasks.
+        Each bound is consistent, so the result is too.
+        """
+        environment = self.environment
+        stride = environment.stride
+        costs = environment.step_costs
+        start_cell = environment.cell(*start)
+        active = [view for view in self.views if view[start_cell] != self.unreached]
+        goals = []
+        for x, y in tasks:
+            cell = environment.cell(x, y)
+            task_cost = costs[cell]
+            bounds = [(view, view[cell]) for view in active]
+            bounds.sort(key=lambda bound: -max(bound[1] - bound[0][start_cell],
+                                               bound[0][start_cell] - bound[1] + task_cost - costs[start_cell]))
+            goals.append((x, y, task_cost, bounds[:ACTIVE_LANDMARKS]))
+
+        def distance(pos):
+            x, y = pos
+            cell = (y + 1) * stride + x + 1
+            cell_cost = costs[cell]
+            best = None
+            for tx, ty, task_cost, bounds in goals:
+                bound = abs(x - tx) + abs(y - ty)
+                for view, to_task in bounds:
+                    to_cell = view[cell]
+                    if to_task - to_cell > bound:
+                        bound = to_task - to_cell
+                    if to_cell - to_task + task_cost - cell_cost > bound:
+                        bound = to_cell - to_task + task_cost - cell_cost
+                if best is None or bound < best:
+                    best = bound
+            return best or 0
+
+        return distance
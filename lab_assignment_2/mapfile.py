@@ -0,0 +1,174 @@
+# mapfile.py
+import mmap
+import struct
+import zlib
+import numpy as np
+from environment import Environment
+from landmarks import LandmarkIndex
+
+MAGIC = b'GRIDMAP1'
+HEADER = struct.Struct('<8sIII')  # magic, columns, rows, number of tasks
+TASK_RECORD = np.dtype([('x', '<i4'), ('y', '<i4'), ('number', '<i4')])
+BLOCKED_TERRAIN = b'@OTW'  # MovingAI out-of-bounds, trees and water; '.', 'G' and 'S' are passable
+LANDMARK_MAGIC = b'GRIDALT1'
+LANDMARK_HEADER = struct.Struct('<8sIIIII')  # magic, columns, rows, landmarks, bytes per entry, layout checksum
+
+
+def _map_file(path):
+    """Memory-map a whole file read-only, so NumPy parses it without reading it into bytes first."""
+    with open(path, 'rb') as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_moving_ai(path):
+    """
+    Read a MovingAI .map file.
+
+    Returns a (rows, columns) boolean array, True on barriers. Only the
+    header is parsed in Python; the grid rows are classified in one NumPy
+    pass over the memory-mapped file, which builds a new array.
+    """
+    data = _map_file(path)
+    fields = {}
+    offset = 0
+    while True:
+        end = data.find(b'\n', offset)
+        if end < 0:
+            raise ValueError(f"{path}: missing 'map' line")
+        line = data[offset:end].strip()
+        offset = end + 1
+        if line == b'map':
+            break
+        key, _, value = line.partition(b' ')
+        fields[key] = value
+    try:
+        rows, columns = int(fields[b'height']), int(fields[b'width'])
+    except (KeyError, ValueError):
+        raise ValueError(f"{path}: header needs numeric height and width")
+
+    end = data.find(b'\n', offset)
+    line_length = end - offset + 1 if end >= 0 else columns + 1  # Includes '\r\n' line endings
+    needed = rows * line_length
+    if len(data) - offset >= needed:
+        grid = np.frombuffer(data, dtype=np.uint8, count=needed, offset=offset)
+    else:
+        # Last line has no trailing newline; pad a copy of the rows
+        grid = np.frombuffer(data[offset:] + b'\n' * (needed - len(data) + offset), dtype=np.uint8)
+    grid = grid.reshape(rows, line_length)[:, :columns]
+    return np.isin(grid, np.frombuffer(BLOCKED_TERRAIN, dtype=np.uint8))
+
+
+def read_bitmap(path):
+    """
+    Read a packed binary map written by save_map.
+
+    Returns (barriers, tasks): a (rows, columns) boolean array, True on
+    barriers, and a dict of (x, y) -> task number. The packed rows are
+    unpacked in one NumPy pass over the memory-mapped file into a new
+    byte-per-cell array.
+    """
+    data = _map_file(path)
+    magic, columns, rows, num_tasks = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a packed grid map")
+    row_bytes = (columns + 7) // 8
+    packed = np.frombuffer(data, dtype=np.uint8, count=rows * row_bytes, offset=HEADER.size)
+    barriers = np.unpackbits(packed.reshape(rows, row_bytes), axis=1, count=columns).view(bool)
+    records = np.frombuffer(data, dtype=TASK_RECORD, count=num_tasks, offset=HEADER.size + rows * row_bytes)
+    tasks = {(int(x), int(y)): int(number) for x, y, number in records.tolist()}
+    return barriers, tasks
+
+
+def load_map(path, grid_size=1, num_tasks=0):
+    """
+    Create an Environment from a MovingAI .map file or a packed binary map.
+
+    The Environment copies the layout into its own mutable grid and
+    barrier set, so every process that loads a map holds a private copy;
+    memory mapping only saves reading the file into Python first.
+
+    Args:
+        path: File to read; '.map' files are parsed as MovingAI text
+        grid_size: Pixel size of one cell
+        num_tasks: Random tasks to add, reachable from the start at (0, 0)
+    Returns:
+        The loaded Environment
+    """
+    if str(path).endswith('.map'):
+        barriers, tasks = read_moving_ai(path), {}
+    else:
+        barriers, tasks = read_bitmap(path)
+    rows, columns = barriers.shape
+    environment = Environment(columns * grid_size, rows * grid_size, grid_size, num_tasks=0, num_barriers=0)
+    environment.load_layout(barriers, tasks)
+    if num_tasks:
+        environment.place_tasks(num_tasks)
+    return environment
+
+
+def save_map(environment, path):
+    """
+    Write an environment's layout. '.map' paths get MovingAI text, which
+    has no tasks; any other path gets the packed binary format, one bit
+    per cell followed by the task records.
+    """
+    barriers = environment.barrier_bitmap[1:-1, 1:-1]
+    if str(path).endswith('.map'):
+        header = f"type octile\nheight {environment.rows}\nwidth {environment.columns}\nmap\n".encode()
+        grid = np.full((environment.rows, environment.columns + 1), ord('\n'), dtype=np.uint8)
+        grid[:, :-1] = np.where(barriers, ord('@'), ord('.'))
+        with open(path, 'wb') as file:
+            file.write(header)
+            file.write(grid.tobytes())
+        return
+    tasks = np.array([(x, y, number) for (x, y), number in environment.task_locations.items()],
+                     dtype=TASK_RECORD)
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, environment.columns, environment.rows, len(tasks)))
+        file.write(np.packbits(barriers.astype(bool), axis=1).tobytes())
+        file.write(tasks.tobytes())
+
+
+def layout_checksum(environment):
+    """CRC-32 of the barrier and step cost arrays, tying saved tables to one layout."""
+    return zlib.crc32(environment.step_costs, zlib.crc32(environment.blocked))
+
+
+def save_landmarks(landmarks, path):
+    """Write a LandmarkIndex's landmark cells and cost tables, stamped with its layout's checksum."""
+    environment = landmarks.environment
+    fields = np.ascontiguousarray(landmarks.fields)
+    with open(path, 'wb') as file:
+        file.write(LANDMARK_HEADER.pack(LANDMARK_MAGIC, environment.columns, environment.rows,
+                                        len(landmarks.landmarks), fields.dtype.itemsize,
+                                        layout_checksum(environment)))
+        file.write(np.array(landmarks.landmarks, dtype='<i4').tobytes())
+        file.write(fields.astype(fields.dtype.newbyteorder('<')).tobytes())
+
+
+def load_landmarks(environment, path):
+    """
+    Load landmark tables written by save_landmarks for environment.
+
+    The tables are memory-mapped rather than read, so loading is cheap
+    and processes planning on the same map share them.
+
+    Args:
+        environment: Environment whose layout the tables were built on
+        path: File written by save_landmarks
+    Returns:
+        A LandmarkIndex for environment
+    Raises:
+        ValueError: If the file is not a landmark file or was built for another layout
+    """
+    data = _map_file(path)
+    magic, columns, rows, count, itemsize, checksum = LANDMARK_HEADER.unpack_from(data)
+    if magic != LANDMARK_MAGIC:
+        raise ValueError(f"{path}: not a landmark file")
+    if (columns, rows) != (environment.columns, environment.rows) or checksum != layout_checksum(environment):
+        raise ValueError(f"{path}: landmarks were built for a different layout")
+    offset = LANDMARK_HEADER.size
+    cells = np.frombuffer(data, dtype='<i4', count=count, offset=offset)
+    size = len(environment.blocked)
+    fields = np.frombuffer(data, dtype=f'<u{itemsize}', count=count * size, offset=offset + 4 * count)
+    return LandmarkIndex(environment, landmarks=cells.tolist(), fields=fields.reshape(count, size))
@@ -0,0 +1,59 @@
+# pathcache.py
+from collections import OrderedDict
+
+PATH_CACHE_SIZE = 256  # Entries kept before the least recently used one is evicted
+
+
+class PathCache:
+    """
+    Bounded least-recently-used cache for planning results.
+
+    Keys should include the environment's layout_version, which changes
+    whenever a barrier or step cost does and is never reused by another
+    environment, so stale entries are simply never asked for again and
+    age out. Hits, misses and evictions are counted.
+    """
+
+    def __init__(self, capacity=PATH_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        """Return the value for key and mark it most recently used, or default."""
+        value = self.entries.get(key, self)
+        if value is self:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entries beyond capacity."""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    @property
+    def hit_rate(self):
+        """Fraction of lookups that were hits, 0.0 before the first lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self):
+        return {"size": len(self.entries), "capacity": self.capacity, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hit_rate}
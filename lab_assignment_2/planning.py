@@ -0,0 +1,116 @@
+# planning.py
+import itertools
+import queue
+import threading
+
+
+class PlanningService:
+    """
+    Run agent searches on a background thread so the caller's loop keeps going.
+
+    submit() queues a plan from the agent's current position and poll(),
+    called once per frame, hands finished plans back to their agents.
+    replan() queues a plan from the agent's next waypoint when the layout
+    changed since its path was planned, and the agent keeps walking that
+    path meanwhile. A plan is only adopted if the layout is the one it was
+    made from, its goal is still a task and its start is the agent's
+    position or still ahead on its path; stale plans are dropped and
+    counted, and the agent is free to submit again. A plan that finds no
+    task stops the agent until the environment changes. One plan per agent
+    is in flight at a time.
+    """
+
+    def __init__(self):
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.pending = {}  # agent -> (ticket, layout version, start) of its plan in flight
+        self.tickets = itertools.count()
+        self.discarded = 0  # Plans dropped because the world moved on while they ran
+        self.worker = threading.Thread(target=self._work, name="planner", daemon=True)
+        self.worker.start()
+
+    def submit(self, agent, start=None):
+        """
+        Queue a plan from start (default: the agent's position) unless one is
+        already in flight, or the agent's last plan found no task and the
+        environment has not changed since.
+        """
+        if agent in self.pending or agent.failed_version == agent.environment.version:
+            return
+        ticket = next(self.tickets)
+        start = tuple(agent.position) if start is None else tuple(start)
+        self.pending[agent] = (ticket, agent.environment.layout_version, start)
+        self.requests.put((agent, ticket, start))
+
+    def replan(self, agent):
+        """
+        Queue a plan from the agent's next waypoint if barriers or step costs
+        changed since its current path was planned. Tasks collected along the
+        way do not count. The agent keeps following its path meanwhile.
+        """
+        if agent in self.pending or not agent.path:
+            return
+        if agent.path_version != agent.environment.layout_version:
+            self.submit(agent, agent.path[0])
+
+    def busy(self, agent):
+        """Return True while a plan for the agent is in flight."""
+        return agent in self.pending
+
+    def cancel(self, agent):
+        """Forget the agent's plan in flight; its result is dropped when it arrives."""
+        self.pending.pop(agent, None)
+
+    def _work(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            agent, ticket, start = request
+            try:
+                result = agent.plan(start)
+            except Exception as error:
+                result = error
+            self.results.put((agent, ticket, result))
+
+    def poll(self):
+        """
+        Hand finished plans to their agents.
+
+        Returns:
+            The agents that adopted a new plan
+        Raises:
+            Any exception a search raised on the planning thread
+        """
+        adopted = []
+        while True:
+            try:
+                agent, ticket, result = self.results.get_nowait()
+            except queue.Empty:
+                return adopted
+            request = self.pending.get(agent)
+            if request is None or request[0] != ticket:
+                continue  # Cancelled
+            del self.pending[agent]
+            if isinstance(result, Exception):
+                raise result
+            _, layout_version, start = request
+            if layout_version != agent.environment.layout_version or (
+                    result.goal is not None and result.goal not in agent.environment.task_locations):
+                self.discarded += 1  # Planned on an old layout, or toward a task collected since
+                continue
+            if start == tuple(agent.position):
+                approach = ()
+            elif start in agent.path:
+                # Planned from a waypoint the agent has not reached yet: walk there first
+                approach = agent.path[:agent.path.index(start) + 1]
+            else:
+                self.discarded += 1  # The agent already walked past the start
+                continue
+            agent.adopt(result, approach)
+            adopted.append(agent)
+
+    def close(self):
+        """Stop the planning thread once the plan it is running finishes."""
+        self.requests.put(None)
+        self.worker.join()
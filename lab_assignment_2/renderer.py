@@ -0,0 +1,148 @@
+# renderer.py
+import pygame
+
+GRID_LINE_COLOR = (200, 200, 200)
+SEPARATOR_COLOR = (0, 0, 0)
+TASK_TEXT_COLOR = (255, 255, 255)
+TERRAIN_SHADE_STEP = 16  # Gray levels per extra unit of step cost
+TERRAIN_DARKEST = 120
+TEXT_CACHE_LIMIT = 512  # Cached text surfaces kept before the cache is cleared
+
+
+class Renderer:
+    """
+    Draw the simulation while only touching what changed since the last frame.
+
+    Terrain shading, grid lines, barriers and the panel separator are
+    pre-rendered onto a static surface. Each frame restores and redraws
+    just the dirty rectangles: cells whose barrier, task or step cost
+    changed, the agent's old and new cells, and the status panel when its
+    text or buttons change. Text surfaces are cached, and draw() returns
+    the rectangles to pass to pygame.display.update().
+    """
+
+    def __init__(self, screen, environment, font, grid_size, status_width,
+                 background_color, barrier_color, task_color, text_color):
+        self.screen = screen
+        self.environment = environment
+        self.font = font
+        self.grid_size = grid_size
+        self.background_color = background_color
+        self.barrier_color = barrier_color
+        self.task_color = task_color
+        self.text_color = text_color
+        self.map_width = environment.columns * grid_size
+        self.map_height = environment.rows * grid_size
+        width, height = screen.get_size()
+        self.panel_rect = pygame.Rect(width - status_width + 1, 0, status_width - 1, height)
+        self.separator_x = width - status_width
+        self.text_cache = {}
+        self.dirty_cells = set()
+        self.sprite_rects = None
+        self.panel_state = None
+        self.needs_full_redraw = True
+
+        self.static = pygame.Surface(screen.get_size())
+        self.static.fill(background_color)
+        for x in range(environment.columns):
+            for y in range(environment.rows):
+                self._draw_static_cell(x, y)
+        pygame.draw.line(self.static, SEPARATOR_COLOR, (self.separator_x, 0), (self.separator_x, height))
+        environment.change_listeners.append(self.dirty_cells.add)
+
+    def detach(self):
+        """Stop listening to environment changes."""
+        if self.dirty_cells.add in self.environment.change_listeners:
+            self.environment.change_listeners.remove(self.dirty_cells.add)
+
+    def text(self, text, color):
+        """Return a cached rendered text surface."""
+        key = (text, color)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            if len(self.text_cache) >= TEXT_CACHE_LIMIT:
+                self.text_cache.clear()
+            surface = self.text_cache[key] = self.font.render(text, True, color)
+        return surface
+
+    def cell_rect(self, x, y):
+        return pygame.Rect(x * self.grid_size, y * self.grid_size, self.grid_size, self.grid_size)
+
+    def _draw_static_cell(self, x, y):
+        """Paint one cell of the static layer: terrain shade and grid outline, or a filled barrier."""
+        rect = self.cell_rect(x, y)
+        cost = self.environment.step_cost(x, y)
+        if cost > 1:
+            # Costlier terrain is darker
+            shade = max(TERRAIN_DARKEST, 255 - TERRAIN_SHADE_STEP * (cost - 1))
+            self.static.fill((shade, shade, shade), rect)
+        else:
+            self.static.fill(self.background_color, rect)
+        pygame.draw.rect(self.static, GRID_LINE_COLOR, rect, 1)
+        if (x, y) in self.environment.barrier_locations:
+            pygame.draw.rect(self.static, self.barrier_color, rect)
+
+    def _draw_cell(self, x, y):
+        """Restore a cell from the static layer and draw its task on top."""
+        rect = self.cell_rect(x, y)
+        self.screen.blit(self.static, rect, rect)
+        task_number = self.environment.task_locations.get((x, y))
+        if task_number is not None:
+            pygame.draw.rect(self.screen, self.task_color, rect)
+            number = self.text(str(task_number), TASK_TEXT_COLOR)
+            self.screen.blit(number, number.get_rect(center=rect.center))
+        return rect
+
+    def _cells_under(self, rect):
+        """Grid positions overlapped by a screen rectangle."""
+        size = self.grid_size
+        for x in range(max(rect.left // size, 0), min((rect.right - 1) // size + 1, self.environment.columns)):
+            for y in range(max(rect.top // size, 0), min((rect.bottom - 1) // size + 1, self.environment.rows)):
+                yield x, y
+
+    def _draw_panel(self, lines, buttons):
+        """Redraw the status panel: text lines as (text, (x, y)) and buttons as (rect, color, label, text color)."""
+        self.screen.blit(self.static, self.panel_rect, self.panel_rect)
+        for text, position in lines:
+            self.screen.blit(self.text(text, self.text_color), position)
+        for rect, color, label, label_color in buttons:
+            pygame.draw.rect(self.screen, color, rect)
+            surface = self.text(label, label_color)
+            self.screen.blit(surface, surface.get_rect(center=rect.center))
+
+    def draw(self, sprites, lines, buttons):
+        """Draw the frame and return the list of screen rectangles that changed."""
+        if self.needs_full_redraw:
+            self.screen.blit(self.static, (0, 0))
+            for x, y in self.environment.task_locations:
+                self._draw_cell(x, y)
+            self.dirty_cells.clear()
+            sprites.draw(self.screen)
+            self.sprite_rects = [sprite.rect.copy() for sprite in sprites]
+            self._draw_panel(lines, buttons)
+            self.panel_state = (lines, buttons)
+            self.needs_full_redraw = False
+            return [self.screen.get_rect()]
+
+        dirty = []
+        for x, y in self.dirty_cells:
+            if self.environment.is_within_bounds(x, y):
+                self._draw_static_cell(x, y)
+                dirty.append(self._draw_cell(x, y))
+        self.dirty_cells.clear()
+
+        sprite_rects = [sprite.rect.copy() for sprite in sprites]
+        if sprite_rects != self.sprite_rects or dirty:
+            # Restore where the agent was, then draw it where it is now
+            for rect in self.sprite_rects or []:
+                for x, y in self._cells_under(rect):
+                    dirty.append(self._draw_cell(x, y))
+            sprites.draw(self.screen)
+            dirty.extend(sprite_rects)
+            self.sprite_rects = sprite_rects
+
+        if (lines, buttons) != self.panel_state:
+            self._draw_panel(lines, buttons)
+            self.panel_state = (lines, buttons)
+            dirty.append(self.panel_rect)
+        return dirty
@@ -3,6 +3,8 @@ import pygame
 import sys
 from agent import Agent
 from environment import Environment
+from planning import PlanningService
+from renderer import Renderer
 
 # Constants
 WINDOW_WIDTH, WINDOW_HEIGHT = 800, 600
@@ -18,6 +20,12 @@ BUTTON_TEXT_COLOR = (255, 255, 255)
 SWITCH_BUTTON_COLOR = (100, 100, 200)
 SWITCH_BUTTON_HOVER_COLOR = (150, 150, 255)
 MOVEMENT_DELAY = 200  # Milliseconds between movements
+ALGORITHM_NAMES = {"ucs": "UCS", "dial": "Dial", "astar": "A*", "alt": "ALT", "arastar": "ARA*", "biucs": "Bi-UCS", "biastar": "Bi-A*", "jps": "JPS", "dstar": "D* Lite", "tour": "Tour", "hpa": "HPA*"}
+
+def create_renderer(screen, environment, font):
+    """Build a Renderer with this simulation's colors."""
+    return Renderer(screen, environment, font, GRID_SIZE, STATUS_WIDTH,
+                    BACKGROUND_COLOR, BARRIER_COLOR, TASK_COLOR, TEXT_COLOR)
 
 def main():
     pygame.init()
@@ -35,6 +43,9 @@ def main():
     agent = Agent(environment, GRID_SIZE, "ucs")  # Start with UCS
     all_sprites = pygame.sprite.Group()
     all_sprites.add(agent)
+    renderer = create_renderer(screen, environment, font)
+    # Searches run on a background thread so drawing and input never wait for them
+    planner = PlanningService()
 
     # Start button
     button_width, button_height = 100, 50
@@ -65,89 +76,78 @@ def main():
                 if not simulation_started and button_rect.collidepoint(event.pos):
                     simulation_started = True
                     if environment.task_locations:
-                        agent.find_nearest_task()
+                        planner.submit(agent)
                 elif switch_button_rect.collidepoint(event.pos):
                     agent.switch_algorithm()
                     simulation_started = False
+                    planner.cancel(agent)
                     # Reset environment and agent
                     environment = Environment(WINDOW_WIDTH, WINDOW_HEIGHT, GRID_SIZE, num_tasks=5, num_barriers=15)
                     agent = Agent(environment, GRID_SIZE, agent.algorithm)
                     all_sprites = pygame.sprite.Group()
                     all_sprites.add(agent)
+                    renderer.detach()
+                    renderer = create_renderer(screen, environment, font)
 
-        screen.fill(BACKGROUND_COLOR)
-
-        # Draw grid and barriers
-        for x in range(environment.columns):
-            for y in range(environment.rows):
-                rect = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-                pygame.draw.rect(screen, (200, 200, 200), rect, 1)
-
-        # Draw barriers
-        for (bx, by) in environment.barrier_locations:
-            barrier_rect = pygame.Rect(bx * GRID_SIZE, by * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-            pygame.draw.rect(screen, BARRIER_COLOR, barrier_rect)
-
-        # Draw tasks with numbers
-        for (tx, ty), task_number in environment.task_locations.items():
-            task_rect = pygame.Rect(tx * GRID_SIZE, ty * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-            pygame.draw.rect(screen, TASK_COLOR, task_rect)
-            task_num_surface = font.render(str(task_number), True, (255, 255, 255))
-            task_num_rect = task_num_surface.get_rect(center=task_rect.center)
-            screen.blit(task_num_surface, task_num_rect)
-
-        # Draw agent
-        all_sprites.draw(screen)
+        # Pick up plans finished on the planning thread
+        planner.poll()
 
-        # Display status panel
+        # Status panel contents
         status_x = WINDOW_WIDTH + 10
-        algorithm_text = f"Algorithm: {'UCS' if agent.algorithm == 'ucs' else 'A*'}"
+        algorithm_text = f"Algorithm: {ALGORITHM_NAMES[agent.algorithm]}"
+        if agent.planning_algorithm() != agent.algorithm:
+            algorithm_text += f" (terrain: {ALGORITHM_NAMES[agent.planning_algorithm()]})"
         task_status_text = f"Tasks Completed: {agent.task_completed}"
         path_cost_text = f"Total Path Cost: {agent.total_path_cost}"
         completed_tasks_text = f"Completed Tasks: {agent.completed_tasks}"
-
-        algorithm_surface = font.render(algorithm_text, True, TEXT_COLOR)
-        status_surface = font.render(task_status_text, True, TEXT_COLOR)
-        path_cost_surface = font.render(path_cost_text, True, TEXT_COLOR)
-        completed_tasks_surface = font.render(completed_tasks_text, True, TEXT_COLOR)
-
-        screen.blit(algorithm_surface, (status_x, 20))
-        screen.blit(status_surface, (status_x, 50))
-        screen.blit(path_cost_surface, (status_x, 80))
-        screen.blit(completed_tasks_surface, (status_x, 110))
-
-        # Draw buttons
+        searches_text = f"Searches: {agent.stats.searches}"
+        nodes_text = f"Nodes Expanded: {agent.stats.nodes_expanded}"
+        last_search = agent.last_search
+        last_search_text = (f"Last Search: {last_search.elapsed * 1000:.1f} ms"
+                            if last_search is not None and last_search.elapsed is not None else "Last Search: -")
+        if last_search is not None and last_search.bound is not None:
+            last_search_text += f" (x{last_search.bound:.2f})"  # Anytime suboptimality bound
+        status_lines = (
+            (algorithm_text, (status_x, 20)),
+            (task_status_text, (status_x, 50)),
+            (path_cost_text, (status_x, 80)),
+            (completed_tasks_text, (status_x, 110)),
+            (searches_text, (status_x, 140)),
+            (nodes_text, (status_x, 170)),
+            (last_search_text, (status_x, 200)),
+        )
+
+        # Buttons
+        mouse_pos = pygame.mouse.get_pos()
+        buttons = []
         if not simulation_started:
             # Start button
-            mouse_pos = pygame.mouse.get_pos()
             button_color = BUTTON_HOVER_COLOR if button_rect.collidepoint(mouse_pos) else BUTTON_COLOR
-            pygame.draw.rect(screen, button_color, button_rect)
-            button_text = font.render("Start", True, BUTTON_TEXT_COLOR)
-            text_rect = button_text.get_rect(center=button_rect.center)
-            screen.blit(button_text, text_rect)
+            buttons.append((button_rect, button_color, "Start", BUTTON_TEXT_COLOR))
 
         # Algorithm switch button
-        switch_color = SWITCH_BUTTON_HOVER_COLOR if switch_button_rect.collidepoint(pygame.mouse.get_pos()) else SWITCH_BUTTON_COLOR
-        pygame.draw.rect(screen, switch_color, switch_button_rect)
-        switch_text = font.render("Switch Algorithm", True, BUTTON_TEXT_COLOR)
-        switch_text_rect = switch_text.get_rect(center=switch_button_rect.center)
-        screen.blit(switch_text, switch_text_rect)
+        switch_color = SWITCH_BUTTON_HOVER_COLOR if switch_button_rect.collidepoint(mouse_pos) else SWITCH_BUTTON_COLOR
+        buttons.append((switch_button_rect, switch_color, "Switch Algorithm", BUTTON_TEXT_COLOR))
+
+        # Only the cells, agent and panel that changed are redrawn and pushed to the display
+        dirty_rects = renderer.draw(all_sprites, status_lines, tuple(buttons))
 
         # Automatic movement with delay
         if simulation_started:
             current_time = pygame.time.get_ticks()
             if current_time - last_move_time > MOVEMENT_DELAY:
                 if not agent.moving and environment.task_locations:
-                    agent.find_nearest_task()
+                    planner.submit(agent)  # No-op while a plan is already running
                 elif agent.moving:
                     agent.move()
                 last_move_time = current_time
+            if agent.moving:
+                # Replan from the next waypoint if the map changed; the agent keeps walking meanwhile
+                planner.replan(agent)
 
-        # Draw the status panel separator
-        pygame.draw.line(screen, (0, 0, 0), (WINDOW_WIDTH, 0), (WINDOW_WIDTH, WINDOW_HEIGHT))
-
-        pygame.display.flip()
+        pygame.display.update(dirty_rects)
 
+    planner.close()
     pygame.quit()
     sys.exit()
 
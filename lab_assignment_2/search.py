@@ -0,0 +1,575 @@
+# search.py
+import heapq
+from bisect import bisect_left, bisect_right
+from array import array
+
+UNREACHED = 2 ** 31 - 1  # Sentinel g-score for cells not yet reached
+
+
+class SearchResult:
+    """Outcome of a grid search: path to the goal plus bookkeeping counters."""
+
+    def __init__(self, path, goal, cost, nodes_expanded, peak_frontier, pushes=None, pops=None, stale_pops=None):
+        self.path = path  # Positions to follow, excluding the start
+        self.goal = goal  # Goal position reached, or None
+        self.cost = cost  # Path cost, or None when no goal is reachable
+        self.nodes_expanded = nodes_expanded
+        self.peak_frontier = peak_frontier  # Largest heap size seen during the search
+        # Heap traffic, None for planners that do not count it
+        self.pushes = pushes
+        self.pops = pops
+        self.stale_pops = stale_pops  # Pops skipped because the cell was already closed
+        self.elapsed = None  # Seconds spent planning, set by Agent.plan
+        self.bound = None  # Cost is at most bound times optimal, set by anytime planners
+        self.version = None  # Environment version the search saw, set by Agent.plan
+        self.layout_version = None  # Environment layout version the search saw, set by Agent.plan
+
+    def __repr__(self):
+        return (f"SearchResult(goal={self.goal}, cost={self.cost}, "
+                f"nodes_expanded={self.nodes_expanded}, peak_frontier={self.peak_frontier})")
+
+
+class SearchStats:
+    """Running totals over every search an agent has made."""
+
+    FIELDS = ("searches", "failed_searches", "nodes_expanded", "pushes", "pops", "stale_pops",
+              "search_time", "peak_frontier")
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        self.search_time = 0.0
+
+    def record(self, result):
+        """Add one SearchResult to the totals."""
+        self.searches += 1
+        if result.goal is None:
+            self.failed_searches += 1
+        self.nodes_expanded += result.nodes_expanded
+        self.pushes += result.pushes or 0
+        self.pops += result.pops or 0
+        self.stale_pops += result.stale_pops or 0
+        self.search_time += result.elapsed or 0.0
+        self.peak_frontier = max(self.peak_frontier, result.peak_frontier)
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class TaskIndex:
+    """Bucket grid over task positions for fast nearest-task distance lookups."""
+
+    def __init__(self, task_locations, bucket_size=None):
+        if bucket_size is None:
+            # Aim for a few tasks per bucket over the area the tasks cover
+            xs = [pos[0] for pos in task_locations] or [0]
+            ys = [pos[1] for pos in task_locations] or [0]
+            area = (max(xs) - min(xs) + 1) * (max(ys) - min(ys) + 1)
+            bucket_size = max(8, int((4 * area / max(len(xs), 1)) ** 0.5))
+        self.bucket_size = bucket_size
+        self.buckets = {}
+        self.order = {}
+        for order, pos in enumerate(task_locations):
+            self.order[pos] = order
+            key = (pos[0] // bucket_size, pos[1] // bucket_size)
+            self.buckets.setdefault(key, []).append(pos)
+        self.cache = {}
+        if self.buckets:
+            keys_x = [key[0] for key in self.buckets]
+            keys_y = [key[1] for key in self.buckets]
+            self.bounds = (min(keys_x), max(keys_x), min(keys_y), max(keys_y))
+
+    def nearest_distance(self, pos):
+        """Return the Manhattan distance from pos to the closest task (admissible for A*)."""
+        if pos in self.cache:
+            return self.cache[pos]
+        if not self.buckets:
+            return 0
+        bx, by = pos[0] // self.bucket_size, pos[1] // self.bucket_size
+        best = float('inf')
+        ring = 0
+        # Any task in ring r is at least (r - 1) * bucket_size + 1 steps away
+        while best > (ring - 1) * self.bucket_size:
+            if 8 * ring > len(self.buckets):
+                # Sparse tasks: scanning the occupied buckets is cheaper than more rings
+                best = min(best, self._scan_buckets(pos, best))
+                break
+            for key in self._ring(bx, by, ring):
+                for tx, ty in self.buckets.get(key, ()):
+                    distance = abs(pos[0] - tx) + abs(pos[1] - ty)
+                    if distance < best:
+                        best = distance
+            ring += 1
+            if ring > self._max_ring(bx, by):
+                break
+        self.cache[pos] = best
+        return best
+
+    def _scan_buckets(self, pos, best):
+        """Check every occupied bucket, skipping those that cannot beat best."""
+        size = self.bucket_size
+        for (kx, ky), tasks in self.buckets.items():
+            # Lower bound on the distance from pos to any cell of this bucket
+            gap_x = max(kx * size - pos[0], pos[0] - (kx * size + size - 1), 0)
+            gap_y = max(ky * size - pos[1], pos[1] - (ky * size + size - 1), 0)
+            if gap_x + gap_y >= best:
+                continue
+            for tx, ty in tasks:
+                distance = abs(pos[0] - tx) + abs(pos[1] - ty)
+                if distance < best:
+                    best = distance
+        return best
+
+    def _ring(self, bx, by, ring):
+        """Yield bucket keys at Chebyshev distance ring from (bx, by)."""
+        if ring == 0:
+            yield (bx, by)
+            return
+        for dx in range(-ring, ring + 1):
+            yield (bx + dx, by - ring)
+            yield (bx + dx, by + ring)
+        for dy in range(-ring + 1, ring):
+            yield (bx - ring, by + dy)
+            yield (bx + ring, by + dy)
+
+    def _max_ring(self, bx, by):
+        """Largest ring that can still contain an occupied bucket."""
+        min_x, max_x, min_y, max_y = self.bounds
+        return max(abs(bx - min_x), abs(bx - max_x), abs(by - min_y), abs(by - max_y))
+
+def grid_search(environment, start, goals, heuristic=None):
+    """
+    Best-first search from start to the cheapest of several goal positions.
+
+    Parents and g-scores live in flat arrays indexed by the environment's
+    padded cell ids, so the heap only holds (f, g, cell) triples and the
+    path is rebuilt once at the goal. Stepping onto a cell costs its
+    environment step cost. With heuristic=None this is Uniform Cost
+    Search; otherwise heuristic(pos) must be consistent (A*), which
+    Manhattan distance is since every step costs at least 1.
+    Among goals at the optimal cost the one with the lowest order in
+    goals (a dict of position -> order) wins.
+    """
+    blocked = environment.blocked
+    costs = environment.step_costs
+    offsets = environment.neighbor_offsets
+    size = len(blocked)
+    parents = array('i', [-1]) * size
+    g_scores = array('i', [UNREACHED]) * size
+    closed = bytearray(size)
+    goal_cells = {environment.cell(*pos): order for pos, order in goals.items()}
+    position = environment.position
+
+    start_cell = environment.cell(*start)
+    g_scores[start_cell] = 0
+    pq = [(heuristic(start) if heuristic else 0, 0, start_cell)]
+    peak_frontier = 1
+    nodes_expanded = 0
+    pops = stale_pops = 0
+    best_cell = -1
+    best_cost = UNREACHED
+    best_order = None
+
+    while pq:
+        f_score, g_score, cell = heapq.heappop(pq)
+        pops += 1
+
+        # Every goal at the optimal cost is popped before anything costlier
+        if f_score > best_cost:
+            break
+
+        if closed[cell]:
+            stale_pops += 1
+            continue
+        closed[cell] = 1
+
+        order = goal_cells.get(cell)
+        if order is not None:
+            if best_order is None or order < best_order:
+                best_cell, best_cost, best_order = cell, g_score, order
+            continue
+
+        # Children of a node at the best cost can only be costlier
+        if g_score >= best_cost:
+            continue
+        nodes_expanded += 1
+
+        for offset in offsets:
+            next_cell = cell + offset
+            if blocked[next_cell] or closed[next_cell]:
+                continue
+            new_g_score = g_score + costs[next_cell]  # Each step costs the cell stepped onto
+            if new_g_score >= g_scores[next_cell]:
+                continue
+            g_scores[next_cell] = new_g_score
+            parents[next_cell] = cell
+            f_score = new_g_score + (heuristic(position(next_cell)) if heuristic else 0)
+            heapq.heappush(pq, (f_score, new_g_score, next_cell))
+        if len(pq) > peak_frontier:
+            peak_frontier = len(pq)
+
+    if best_cell < 0:
+        return SearchResult([], None, None, nodes_expanded, peak_frontier, pops + len(pq), pops, stale_pops)
+    return SearchResult(build_path(environment, parents, best_cell, start_cell),
+                        position(best_cell), best_cost, nodes_expanded, peak_frontier,
+                        pops + len(pq), pops, stale_pops)
+
+
+def bucket_search(environment, start, goals):
+    """
+    Uniform Cost Search with a bucket queue (Dial's algorithm) for small integer step costs.
+
+    Cells wait in a circular array of max_cost + 1 buckets indexed by
+    g-score, so every push and pop is O(1) instead of heapq's O(log n).
+    All cells in a bucket share one g-score; the search settles bucket
+    after bucket and finishes the bucket holding the first goal, so
+    tie-breaking matches grid_search.
+    """
+    blocked = environment.blocked
+    costs = environment.step_costs
+    offsets = environment.neighbor_offsets
+    size = len(blocked)
+    parents = array('i', [-1]) * size
+    g_scores = array('i', [UNREACHED]) * size
+    closed = bytearray(size)
+    goal_cells = {environment.cell(*pos): order for pos, order in goals.items()}
+    width = environment.max_cost + 1  # Pending g-scores never span more than this
+    buckets = [[] for _ in range(width)]
+
+    start_cell = environment.cell(*start)
+    g_scores[start_cell] = 0
+    buckets[0].append(start_cell)
+    pending = 1
+    peak_frontier = 1
+    nodes_expanded = 0
+    pops = stale_pops = 0
+    best_cell = -1
+    best_order = None
+    distance = 0
+
+    while pending:
+        bucket = buckets[distance % width]
+        while bucket:
+            cell = bucket.pop()
+            pending -= 1
+            pops += 1
+            if closed[cell] or g_scores[cell] != distance:
+                stale_pops += 1  # Settled already, or queued again with a lower g-score
+                continue
+            closed[cell] = 1
+
+            order = goal_cells.get(cell)
+            if order is not None:
+                if best_order is None or order < best_order:
+                    best_cell, best_order = cell, order
+                continue
+            if best_cell >= 0:
+                continue  # Children can only be costlier than the goal found
+            nodes_expanded += 1
+
+            for offset in offsets:
+                next_cell = cell + offset
+                if blocked[next_cell] or closed[next_cell]:
+                    continue
+                new_g_score = distance + costs[next_cell]
+                if new_g_score >= g_scores[next_cell]:
+                    continue
+                g_scores[next_cell] = new_g_score
+                parents[next_cell] = cell
+                buckets[new_g_score % width].append(next_cell)
+                pending += 1
+            if pending > peak_frontier:
+                peak_frontier = pending
+        if best_cell >= 0:
+            break
+        distance += 1
+
+    if best_cell < 0:
+        return SearchResult([], None, None, nodes_expanded, peak_frontier, pops + pending, pops, stale_pops)
+    return SearchResult(build_path(environment, parents, best_cell, start_cell),
+                        environment.position(best_cell), distance, nodes_expanded, peak_frontier,
+                        pops + pending, pops, stale_pops)
+
+
+def build_path(environment, parents, goal_cell, start_cell):
+    """Walk parent pointers back from the goal and return the path excluding the start."""
+    path = []
+    cell = goal_cell
+    while cell != start_cell:
+        path.append(environment.position(cell))
+        cell = parents[cell]
+    path.reverse()
+    return path
+
+
+def jump_point_search(environment, start, goals, heuristic):
+    """
+    Jump Point Search for the 4-connected, unit-cost grid.
+
+    Straight runs of symmetric moves are skipped by jumping: horizontal
+    jumps stop at goals or where a cell above/below opens up behind a wall,
+    and vertical jumps also stop wherever a horizontal jump would succeed.
+    Only jump points go on the heap, with edge cost equal to the straight
+    distance between them. Goal handling and tie-breaking match grid_search.
+    Jumping assumes every step costs 1, so step costs are ignored.
+    """
+    blocked = environment.blocked
+    stride = environment.stride
+    size = len(blocked)
+    position = environment.position
+    parents = array('i', [-1]) * size
+    g_scores = array('i', [UNREACHED]) * size
+    closed = bytearray(size)
+    goal_cells = {environment.cell(*pos): order for pos, order in goals.items()}
+    goal_rows = {}
+    for cell in goal_cells:
+        goal_rows.setdefault(cell // stride, []).append(cell)
+    for row in goal_rows.values():
+        row.sort()
+
+    def scan_horizontal(cell, step):
+        """Jump from cell in direction step (+1 or -1); return the jump point or -1."""
+        if step > 0:
+            wall = blocked.find(b'\x01', cell)
+            found = wall
+            # A cell is forced when the cell above/below it is open but the one behind is not
+            for side in (-stride, stride):
+                hit = blocked.find(b'\x01\x00', cell - 1 + side, wall + side)
+                if hit >= 0 and hit + 1 - side < found:
+                    found = hit + 1 - side
+            row = goal_rows.get(cell // stride)
+            if row:
+                i = bisect_left(row, cell)
+                if i < len(row) and row[i] < found:
+                    found = row[i]
+            return found if found < wall else -1
+        wall = blocked.rfind(b'\x01', 0, cell + 1)
+        found = wall
+        for side in (-stride, stride):
+            hit = blocked.rfind(b'\x00\x01', wall + 1 + side, cell + 2 + side)
+            if hit >= 0 and hit - side > found:
+                found = hit - side
+        row = goal_rows.get(cell // stride)
+        if row:
+            i = bisect_right(row, cell)
+            if i > 0 and row[i - 1] > found:
+                found = row[i - 1]
+        return found if found > wall else -1
+
+    def scan_vertical(cell, step):
+        """Jump from cell in direction step (+stride or -stride); return the jump point or -1."""
+        while not blocked[cell]:
+            if cell in goal_cells:
+                return cell
+            if ((not blocked[cell - 1] and blocked[cell - 1 - step]) or
+                    (not blocked[cell + 1] and blocked[cell + 1 - step])):
+                return cell
+            if scan_horizontal(cell + 1, 1) >= 0 or scan_horizontal(cell - 1, -1) >= 0:
+                return cell
+            cell += step
+        return -1
+
+    start_cell = environment.cell(*start)
+    g_scores[start_cell] = 0
+    pq = [(heuristic(start), 0, start_cell)]
+    peak_frontier = 1
+    nodes_expanded = 0
+    pops = stale_pops = 0
+    best_cell = -1
+    best_cost = UNREACHED
+    best_order = None
+
+    while pq:
+        f_score, g_score, cell = heapq.heappop(pq)
+        pops += 1
+
+        if f_score > best_cost:
+            break
+
+        if closed[cell]:
+            stale_pops += 1
+            continue
+        closed[cell] = 1
+
+        order = goal_cells.get(cell)
+        if order is not None:
+            if best_order is None or order < best_order:
+                best_cell, best_cost, best_order = cell, g_score, order
+            continue
+
+        if g_score >= best_cost:
+            continue
+        nodes_expanded += 1
+
+        # Prune to the directions a canonical path can continue in
+        parent = parents[cell]
+        if parent < 0:
+            steps = (-stride, stride, -1, 1)
+        elif abs(cell - parent) < stride:
+            step = 1 if cell > parent else -1
+            steps = (step, -stride, stride)
+        else:
+            step = stride if cell > parent else -stride
+            steps = (step, -1, 1)
+
+        for step in steps:
+            if blocked[cell + step]:
+                continue
+            if step == 1 or step == -1:
+                jump = scan_horizontal(cell + step, step)
+                distance = abs(jump - cell)
+            else:
+                jump = scan_vertical(cell + step, step)
+                distance = abs(jump - cell) // stride
+            if jump < 0 or closed[jump]:
+                continue
+            new_g_score = g_score + distance
+            if new_g_score >= g_scores[jump]:
+                continue
+            g_scores[jump] = new_g_score
+            parents[jump] = cell
+            heapq.heappush(pq, (new_g_score + heuristic(position(jump)), new_g_score, jump))
+        if len(pq) > peak_frontier:
+            peak_frontier = len(pq)
+
+    if best_cell < 0:
+        return SearchResult([], None, None, nodes_expanded, peak_frontier, pops + len(pq), pops, stale_pops)
+
+    # Fill in the straight segments between consecutive jump points
+    path = []
+    cell = best_cell
+    while cell != start_cell:
+        parent = parents[cell]
+        step = (1 if cell > parent else -1) if abs(cell - parent) < stride else (stride if cell > parent else -stride)
+        while cell != parent:
+            path.append(position(cell))
+            cell -= step
+    path.reverse()
+    return SearchResult(path, position(best_cell), best_cost, nodes_expanded, peak_frontier,
+                        pops + len(pq), pops, stale_pops)
+
+
+def bidirectional_search(environment, start, goal, heuristic=True, limit=UNREACHED):
+    """
+    Point-to-point search that grows frontiers from both ends and meets in the middle.
+
+    With heuristic=False this is bidirectional Dijkstra. Otherwise it is
+    bidirectional A* with the average of the Manhattan distances to goal
+    and start as potential, p(v) = (h_goal(v) - h_start(v)) / 2 forward and
+    -p(v) backward, which keeps both sides consistent. Keys are doubled so
+    they stay integers. Each step expands the side with the smaller
+    frontier, and the search stops once the two smallest keys prove no
+    path shorter than the best meeting so far exists, or none within limit.
+    Step costs count as in grid_search.
+    """
+    blocked = environment.blocked
+    costs = environment.step_costs
+    offsets = environment.neighbor_offsets
+    stride = environment.stride
+    size = len(blocked)
+    position = environment.position
+    start_cell = environment.cell(*start)
+    goal_cell = environment.cell(*goal)
+    if start_cell == goal_cell:
+        return SearchResult([], goal, 0, 0, 1, 0, 0, 0)
+    start_y, start_x = divmod(start_cell, stride)
+    goal_y, goal_x = divmod(goal_cell, stride)
+
+    def potential(cell):
+        """Twice the forward potential of cell."""
+        if not heuristic:
+            return 0
+        y, x = divmod(cell, stride)
+        return abs(x - goal_x) + abs(y - goal_y) - abs(x - start_x) - abs(y - start_y)
+
+    # Index 0 is the forward search from start, index 1 the backward search from goal
+    parents = (array('i', [-1]) * size, array('i', [-1]) * size)
+    g_scores = (array('i', [UNREACHED]) * size, array('i', [UNREACHED]) * size)
+    closed = (bytearray(size), bytearray(size))
+    signs = (1, -1)
+    g_scores[0][start_cell] = 0
+    g_scores[1][goal_cell] = 0
+    queues = ([(potential(start_cell), 0, start_cell)], [(-potential(goal_cell), 0, goal_cell)])
+    peak_frontier = 2
+    nodes_expanded = 0
+    pops = stale_pops = 0
+    best_cost = UNREACHED  # Cost of the best path through a meeting cell so far
+    meeting = -1
+
+    while queues[0] and queues[1]:
+        # Any path not found yet costs at least half the sum of the doubled top keys
+        bound = queues[0][0][0] + queues[1][0][0]
+        if bound >= 2 * best_cost or bound > 2 * limit:
+            break
+        side = 0 if len(queues[0]) <= len(queues[1]) else 1
+        queue = queues[side]
+        _, g_score, cell = heapq.heappop(queue)
+        pops += 1
+        if closed[side][cell]:
+            stale_pops += 1
+            continue
+        closed[side][cell] = 1
+        nodes_expanded += 1
+
+        own_g, other_g = g_scores[side], g_scores[1 - side]
+        own_parents = parents[side]
+        sign = signs[side]
+        backward_step = g_score + costs[cell]  # Backward edges step onto the cell being expanded
+        for offset in offsets:
+            next_cell = cell + offset
+            if blocked[next_cell] or closed[side][next_cell]:
+                continue
+            new_g_score = backward_step if side else g_score + costs[next_cell]
+            if new_g_score >= own_g[next_cell]:
+                continue
+            own_g[next_cell] = new_g_score
+            own_parents[next_cell] = cell
+            heapq.heappush(queue, (2 * new_g_score + sign * potential(next_cell), new_g_score, next_cell))
+            # Forward labels count the cells stepped onto up to next_cell, backward ones those after it
+            if other_g[next_cell] != UNREACHED and new_g_score + other_g[next_cell] < best_cost:
+                best_cost = new_g_score + other_g[next_cell]
+                meeting = next_cell
+
+        if len(queues[0]) + len(queues[1]) > peak_frontier:
+            peak_frontier = len(queues[0]) + len(queues[1])
+
+    pushes = pops + len(queues[0]) + len(queues[1])
+    if meeting < 0 or best_cost > limit:
+        return SearchResult([], None, None, nodes_expanded, peak_frontier, pushes, pops, stale_pops)
+    path = build_path(environment, parents[0], meeting, start_cell)
+    cell = meeting
+    while cell != goal_cell:
+        cell = parents[1][cell]
+        path.append(position(cell))
+    return SearchResult(path, goal, best_cost, nodes_expanded, peak_frontier, pushes, pops, stale_pops)
+
+
+def bidirectional_nearest(environment, start, goals, heuristic=True):
+    """
+    Nearest goal by running bidirectional_search towards one candidate at a time.
+
+    Candidates are tried in order of Manhattan distance, which bounds
+    their path cost from below, so the loop stops at the first candidate
+    that cannot beat the best path found, and later searches give up as
+    soon as they exceed it. Tie-breaking matches grid_search.
+    """
+    start_x, start_y = start
+    candidates = sorted((abs(x - start_x) + abs(y - start_y), order, (x, y)) for (x, y), order in goals.items())
+    best = None
+    best_order = None
+    totals = SearchStats()
+    for distance, order, goal in candidates:
+        if best is not None and (distance > best.cost or (distance == best.cost and order > best_order)):
+            if distance > best.cost:
+                break
+            continue
+        result = bidirectional_search(environment, start, goal, heuristic,
+                                      best.cost if best is not None else UNREACHED)
+        totals.record(result)
+        if result.goal is not None and (best is None or result.cost < best.cost or
+                                        (result.cost == best.cost and order < best_order)):
+            best, best_order = result, order
+    if best is None:
+        best = SearchResult([], None, None, 0, 0)
+    return SearchResult(best.path, best.goal, best.cost, totals.nodes_expanded, totals.peak_frontier,
+                        totals.pushes, totals.pops, totals.stale_pops)
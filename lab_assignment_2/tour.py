@@ -0,0 +1,214 @@
+# tour.py
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from pathcache import PathCache
+from search import SearchResult
+
+UNREACHED = 2 ** 31 - 1
+FIELD_CACHE_SIZE = 64  # Task direction fields kept; raised to the task count when one plan needs more
+
+
+def bfs_fields(blocked, stride, source):
+    """
+    Breadth-first search from source over the padded barrier bitmap.
+
+    Returns NumPy (distance, directions) arrays indexed by cell id:
+    distance is the step count to source (UNREACHED where unreachable),
+    and directions[cell] holds 1 + the index of the step in
+    (-stride, stride, -1, 1) that moves one cell closer to source. Each
+    BFS level is expanded with NumPy in one go.
+    """
+    offsets = np.array([-stride, stride, -1, 1])
+    back = np.array([2, 1, 4, 3], dtype=np.uint8)  # Direction code pointing back the way we came
+    walls = np.frombuffer(blocked, dtype=np.uint8)
+    distance = np.full(len(walls), UNREACHED, dtype=np.int32)
+    directions = np.zeros(len(walls), dtype=np.uint8)
+    distance[source] = 0
+    frontier = np.array([source])
+    level = 0
+    while frontier.size:
+        level += 1
+        cells = (frontier[None, :] + offsets[:, None]).ravel()
+        codes = np.repeat(back, frontier.size)
+        fresh = (walls[cells] == 0) & (distance[cells] == UNREACHED)
+        cells, first = np.unique(cells[fresh], return_index=True)
+        distance[cells] = level
+        directions[cells] = codes[fresh][first]
+        frontier = cells
+    return distance, directions
+
+
+def bfs_directions(blocked, stride, source, targets):
+    """
+    Return (directions, distances, settled) for a BFS from source: the
+    direction field as a bytearray, the step count to each target cell and
+    the number of cells the search reached. Module level so it can run in
+    a worker process.
+    """
+    distance, directions = bfs_fields(blocked, stride, source)
+    settled = int(np.count_nonzero(distance != UNREACHED))
+    return bytearray(directions.tobytes()), distance[targets].tolist(), settled
+
+
+def distance_field(blocked, stride, source):
+    """Return the BFS distance to source for every cell, packed as int32 bytes for cheap transfer."""
+    return bfs_fields(blocked, stride, source)[0].tobytes()
+
+
+class TourPlanner:
+    """
+    Plan one route that visits every task instead of greedily chasing the nearest one.
+
+    One BFS per task gives a task-to-task distance matrix plus a compact
+    direction field per task. Both are kept in an LRU cache keyed on the
+    task and the environment's layout version, so replanning after tasks
+    are added only searches from the new ones. The
+    visiting order comes from nearest insertion followed by 2-opt, and the
+    route is stitched together by walking the direction fields.
+    """
+
+    def __init__(self, environment, workers=1):
+        self.environment = environment
+        self.workers = workers
+        self.cache = PathCache(FIELD_CACHE_SIZE)  # (task cell, layout version) -> (directions, distances)
+        self.fields = {}  # Task cell -> direction bytearray toward that task, for the current plan
+        self.distances = {}  # Task cell -> {other task cell: distance}, for the current plan
+        self.settled = 0  # Cells reached by the BFS runs of the current plan
+        self.searches = 0  # BFS runs performed, for comparing against greedy planning
+
+    def _search_tasks(self, tasks):
+        """Run one BFS per uncached task, in parallel when workers > 1."""
+        environment = self.environment
+        version = environment.layout_version
+        # A plan needs every task's field at once, so it must never evict its own
+        self.cache.capacity = max(self.cache.capacity, len(tasks))
+        entries = {task: self.cache.get((task, version)) for task in tasks}
+        missing = [task for task in tasks if entries[task] is None]
+        searched = set(missing)
+        for task, entry in entries.items():
+            # Distances are looked up either way round, so each pair needs one side that knows the other
+            if entry is not None and any(other not in entry[1] and other not in searched for other in tasks):
+                missing.append(task)
+                searched.add(task)
+        blocked = bytes(environment.blocked) if missing else b''
+        args = [(blocked, environment.stride, task, tasks) for task in missing]
+        if self.workers > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(self.workers) as pool:
+                results = list(pool.map(bfs_directions, *zip(*args)))
+        else:
+            results = [bfs_directions(*arg) for arg in args]
+        self.searches += len(missing)
+        self.settled = sum(result[2] for result in results)
+        for task, (directions, distances, _) in zip(missing, results):
+            entries[task] = (directions, dict(zip(tasks, distances)))
+            self.cache.put((task, version), entries[task])
+        self.fields = {task: entry[0] for task, entry in entries.items()}
+        self.distances = {task: entry[1] for task, entry in entries.items()}
+
+    def distance_matrix(self, start_cell, tasks):
+        """Build the (start + tasks) distance matrix from the cache; index 0 is the start."""
+        self._search_tasks(tasks)
+        _, from_start, settled = bfs_directions(self.environment.blocked, self.environment.stride, start_cell, tasks)
+        self.searches += 1
+        self.settled += settled
+        matrix = [[0] + from_start]
+        for a, task_a in enumerate(tasks):
+            row = [from_start[a]]
+            known = self.distances[task_a]
+            for task_b in tasks:
+                # Grid moves are symmetric, so either BFS can answer
+                distance = known.get(task_b)
+                row.append(distance if distance is not None else self.distances[task_b][task_a])
+            matrix.append(row)
+        return matrix
+
+    @staticmethod
+    def nearest_neighbor(d):
+        """Greedy order: always go to the closest unvisited node (what the agent did before)."""
+        remaining = {i for i in range(1, len(d)) if d[0][i] < UNREACHED}
+        tour = [0]
+        while remaining:
+            node = min(remaining, key=d[tour[-1]].__getitem__)
+            remaining.discard(node)
+            tour.append(node)
+        return tour
+
+    @staticmethod
+    def nearest_insertion(d):
+        """Add the node closest to the route, at the position where it costs the least."""
+        remaining = {i for i in range(1, len(d)) if d[0][i] < UNREACHED}
+        tour = [0]
+        nearest = {i: d[0][i] for i in remaining}
+        while remaining:
+            node = min(remaining, key=nearest.__getitem__)
+            remaining.discard(node)
+            best_position = len(tour)
+            best_increase = d[tour[-1]][node]  # Appending at the end of the open route
+            for k in range(1, len(tour)):
+                a, b = tour[k - 1], tour[k]
+                increase = d[a][node] + d[node][b] - d[a][b]
+                if increase < best_increase:
+                    best_position, best_increase = k, increase
+            tour.insert(best_position, node)
+            for i in remaining:
+                if d[node][i] < nearest[i]:
+                    nearest[i] = d[node][i]
+        return tour
+
+    @staticmethod
+    def two_opt(d, tour):
+        """Reverse route segments while that shortens the open route; the start stays first."""
+        improved = True
+        while improved:
+            improved = False
+            for i in range(1, len(tour) - 1):
+                for j in range(i + 1, len(tour)):
+                    a, b, c = tour[i - 1], tour[i], tour[j]
+                    before = d[a][b]
+                    after = d[a][c]
+                    if j + 1 < len(tour):
+                        e = tour[j + 1]
+                        before += d[c][e]
+                        after += d[b][e]
+                    if after < before:
+                        tour[i:j + 1] = reversed(tour[i:j + 1])
+                        improved = True
+        return tour
+
+    @staticmethod
+    def route_cost(d, tour):
+        return sum(d[a][b] for a, b in zip(tour, tour[1:]))
+
+    @classmethod
+    def solve(cls, matrix):
+        """Return the better 2-opt-improved order of nearest neighbor and nearest insertion."""
+        candidates = [cls.two_opt(matrix, cls.nearest_neighbor(matrix)),
+                      cls.two_opt(matrix, cls.nearest_insertion(matrix))]
+        return min(candidates, key=lambda tour: cls.route_cost(matrix, tour))[1:]
+
+    def plan(self, start):
+        """Return a SearchResult whose path visits every reachable task from start."""
+        environment = self.environment
+        start_cell = environment.cell(*start)
+        # Skip tasks in other regions instead of flooding their distance fields
+        tasks = [cell for cell in (environment.cell(*pos) for pos in list(environment.task_locations))
+                 if environment.components.connected(start_cell, cell)]
+        matrix = self.distance_matrix(start_cell, tasks)
+        order = self.solve(matrix)
+        if not order:
+            return SearchResult([], None, None, self.settled, 0)
+
+        offsets = environment.neighbor_offsets
+        path = []
+        cell = start_cell
+        cost = 0
+        previous = 0
+        for index in order:
+            task = tasks[index - 1]
+            directions = self.fields[task]
+            while cell != task:
+                cell += offsets[directions[cell] - 1]
+                path.append(environment.position(cell))
+            cost += matrix[previous][index]
+            previous = index
+        return SearchResult(path, environment.position(cell), cost, self.settled, 0)
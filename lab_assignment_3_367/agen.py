@@ -1,5 +1,6 @@
 from typing import List, Dict, Tuple
 import numpy as np
+from chromosome import ScheduleCodec
 
 class Student:
     def __init__(self, id: int, availability: List[bool], preference: float):
@@ -49,10 +50,21 @@ class Student:
         return conflicts
 
 class GeneticAlgorithm:
-    def __init__(self, population_size: int, mutation_rate: float):
-        """Initialize GA with parameters"""
+    def __init__(self, population_size: int, mutation_rate: float, codec: ScheduleCodec = None,
+                 random_state: np.random.RandomState = None):
+        """
+        Initialize GA with parameters
+        Args:
+            population_size: Number of schedules per generation
+            mutation_rate: Probability of mutating each cell
+            codec: Integer encoding of the schedules; built from class_durations when None
+            random_state: Private random stream for selection, crossover and mutation;
+                NumPy's global one when None
+        """
         self.population_size = population_size
         self.mutation_rate = mutation_rate
+        self.codec = codec
+        self.random = np.random if random_state is None else random_state
         self.best_fitness_history = []
         self.current_generation = 0
 
@@ -112,151 +124,238 @@ class GeneticAlgorithm:
         
         return max(0.0, fitness)
 
-    def tournament_select(self, population: List[List[List[str]]], 
+    def calculate_fitness_batch(self, population: np.ndarray,
+                                student_preferences: Dict[int, float],
+                                student_availability: Dict[int, List[bool]],
+                                codec: ScheduleCodec = None) -> np.ndarray:
+        """
+        Calculate fitness scores for a whole population at once
+        Args:
+            population: Encoded schedules, or cell strings when codec is None,
+                shaped (population, students, slots)
+            student_preferences: Dict mapping student ID to preference value
+            student_availability: Dict mapping student ID to list of available slots
+            codec: Encoding of the schedules; defaults to the GA's codec for integer arrays
+        Returns:
+            Array of fitness scores, equal to calculate_fitness on each decoded schedule
+        """
+        population = np.asarray(population)
+        if population.ndim != 3:
+            raise ValueError(f"Expected a (population, students, slots) array, got shape {population.shape}")
+        num_schedules, num_students, num_slots = population.shape
+        fitness = np.zeros(num_schedules)
+        if not num_students or not student_preferences or not student_availability:
+            return fitness
+
+        codec = codec or self.codec
+        if population.dtype.kind in 'iu' and codec is not None:
+            # Codes index the tables directly; each class has its own code
+            cell_ids = codec.expand(population)
+            occupied = np.arange(len(codec.cells)) != 0
+            cell_class = np.arange(len(codec.cells))
+            cell_priority = codec.priorities.astype(np.intp)
+        else:
+            cell_ids, occupied, cell_class, cell_priority = self._parse_cells(population)
+
+        # Same operations in the same order as calculate_fitness, one student and slot at a time
+        # across the population, so the scores match it exactly
+        rows = np.arange(num_schedules)
+        for i in range(num_students):
+            if i not in student_preferences or i not in student_availability:
+                continue
+            student_pref = student_preferences[i]
+            availability = student_availability[i]
+            ids = cell_ids[:, i, :]
+            filled = occupied[ids]
+
+            for j in range(num_slots):
+                if j >= len(availability) or not availability[j]:
+                    fitness = np.where(filled[:, j], fitness - 1.0, fitness)
+                # Second hour of a 2-hour class repeats the previous cell
+                first_hour = filled[:, j] & (ids[:, j] != ids[:, j - 1]) if j > 0 else filled[:, j]
+                fitness = np.where(first_hour, fitness + student_pref, fitness)
+
+            class_count = np.zeros((num_schedules, max(cell_class.max(initial=0) + 1, 1)), dtype=np.intp)
+            for j in range(num_slots):
+                column = ids[:, j]
+                classes = cell_class[column]
+                class_count[rows, classes] += filled[:, j]
+                fitness = np.where(filled[:, j] & (class_count[rows, classes] > 1), fitness - 2.0, fitness)
+                priority = cell_priority[column]
+                ranked = filled[:, j] & (priority >= 0)
+                fitness = np.where(ranked, fitness + (5 - priority) * (num_slots - j) / num_slots, fitness)
+
+        return np.maximum(fitness, 0.0)
+
+    def _parse_cells(self, population: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Map cell strings to ids and parse each distinct string once
+        Args:
+            population: Array of cell strings
+        Returns:
+            Cell ids shaped like population, then per id: occupied flag, class index and priority (-1 if none)
+        """
+        # A set finds the few distinct strings faster than np.unique sorts them all
+        cells = np.array(sorted(set(population.ravel().tolist())), dtype=population.dtype)
+        cell_ids = np.searchsorted(cells, population)
+        class_ids = {}
+        cell_class = np.zeros(len(cells), dtype=np.intp)
+        cell_priority = np.full(len(cells), -1)  # -1 where the class name has no priority digit
+        occupied = np.zeros(len(cells), dtype=bool)
+        for k, cell in enumerate(cells.tolist()):
+            if not cell:
+                continue
+            occupied[k] = True
+            class_name = cell.split()[0]
+            cell_class[k] = class_ids.setdefault(class_name, len(class_ids))
+            try:
+                cell_priority[k] = int(class_name[1])
+            except (IndexError, ValueError):
+                pass
+        return cell_ids, occupied, cell_class, cell_priority
+
+    def _get_codec(self, class_durations: Dict[str, Dict[str, int]] = None) -> ScheduleCodec:
+        """Return the schedule encoding, building it from class_durations on first use"""
+        if self.codec is None:
+            if class_durations is None:
+                raise ValueError("GeneticAlgorithm needs a codec or class_durations")
+            self.codec = ScheduleCodec(class_durations)
+        return self.codec
+
+    def tournament_select(self, population: np.ndarray,
                          fitness_scores: List[float], 
-                         tournament_size: int = 3) -> List[List[str]]:
+                         tournament_size: int = 3) -> np.ndarray:
         """
         Select parent using tournament selection
         Args:
-            population: List of schedules
+            population: Encoded schedules shaped (population, students, slots)
             fitness_scores: List of fitness scores
             tournament_size: Number of candidates in tournament
         Returns:
             Selected parent schedule
         """
-        if not population or not fitness_scores:
-            return []
-            
-        tournament_size = min(tournament_size, len(population))
-        tournament_indices = np.random.choice(len(population), tournament_size, replace=False)
-        tournament_fitness = [fitness_scores[i] for i in tournament_indices]
-        winner_idx = tournament_indices[np.argmax(tournament_fitness)]
-        return population[winner_idx]
+        if len(population) == 0 or len(fitness_scores) == 0:
+            return np.empty((0, 0), dtype=np.int8)
+        return population[self._select_indices(fitness_scores, 1, tournament_size)[0]]
 
-    def crossover(self, parent1: List[List[str]], parent2: List[List[str]], 
-                 class_durations: Dict[str, Dict[str, int]]) -> List[List[str]]:
+    def _select_indices(self, fitness_scores: List[float], count: int, tournament_size: int = 3) -> np.ndarray:
+        """
+        Run count tournaments at once
+        Args:
+            fitness_scores: List of fitness scores
+            count: Number of tournaments
+            tournament_size: Distinct candidates per tournament
+        Returns:
+            Index of each tournament's winner; ties go to the first candidate drawn
+        """
+        fitness_scores = np.asarray(fitness_scores)
+        tournament_size = min(tournament_size, len(fitness_scores))
+        candidates = self.random.randint(0, len(fitness_scores), (count, tournament_size))
+        # Redraw the tournaments that drew a candidate twice until every row is distinct
+        while tournament_size > 1:
+            ordered = np.sort(candidates, axis=1)
+            repeated = np.flatnonzero((ordered[:, 1:] == ordered[:, :-1]).any(axis=1))
+            if not len(repeated):
+                break
+            candidates[repeated] = self.random.randint(0, len(fitness_scores), (len(repeated), tournament_size))
+        winners = np.argmax(fitness_scores[candidates], axis=1)
+        return candidates[np.arange(count), winners]
+
+    def crossover(self, parent1: np.ndarray, parent2: np.ndarray,
+                 class_durations: Dict[str, Dict[str, int]] = None) -> np.ndarray:
         """
         Perform crossover between two parents
         Args:
-            parent1, parent2: Parent schedules
-            class_durations: Dict containing class duration information
+            parent1, parent2: Encoded parent schedules, either one pair shaped
+                (students, slots) or stacks shaped (children, students, slots)
+            class_durations: Dict containing class duration information, used if the GA has no codec
         Returns:
-            Child schedule
+            Child schedule(s) taking slots before a random point from parent1 and the rest from parent2
         """
-        if not parent1 or not parent2 or len(parent1) != len(parent2):
+        if parent1.size == 0 or parent2.size == 0 or parent1.shape != parent2.shape:
             return parent1
-            
-        child = []
-        crossover_point = np.random.randint(0, len(parent1[0]))
-        
-        for i in range(len(parent1)):
-            row = []
-            current_class = None
-            remaining_duration = 0
-            
-            for j in range(len(parent1[0])):
-                if remaining_duration > 0:
-                    row.append(current_class)
-                    remaining_duration -= 1
-                    continue
-                    
-                if j < crossover_point:
-                    cell = parent1[i][j]
-                else:
-                    cell = parent2[i][j]
-                    
-                row.append(cell)
-                
-                if cell:
-                    try:
-                        class_name = cell.split()[0]
-                        duration = int(cell.split()[1][0])
-                        if duration == 2 and j < len(parent1[0]) - 1:
-                            current_class = cell
-                            remaining_duration = 1
-                    except (IndexError, ValueError):
-                        continue
-                        
-            child.append(row)
-            
-        return child
+        codec = self._get_codec(class_durations)
+        num_slots = parent1.shape[-1]
+        # One crossover point per child, shared by all of its students
+        crossover_point = self.random.randint(0, num_slots, size=parent1.shape[:-2] + (1, 1))
+        child = np.where(np.arange(num_slots) < crossover_point, codec.expand(parent1), codec.expand(parent2))
 
-    def mutate(self, schedule: List[List[str]]) -> List[List[str]]:
+        # A 2-hour class started in one slot also takes the next, whichever parent that slot came from
+        forced = np.zeros(child.shape[:-1], dtype=bool)
+        for j in range(num_slots):
+            if j > 0:
+                child[..., j] = np.where(forced, child[..., j - 1], child[..., j])
+            forced = ~forced & (codec.durations[child[..., j]] == 2) & (j < num_slots - 1)
+        return codec.compress(child)
+
+    def mutate(self, schedule: np.ndarray, class_durations: Dict[str, Dict[str, int]] = None) -> np.ndarray:
         """
         Perform mutation on a schedule
         Args:
-            schedule: Schedule to mutate
+            schedule: Encoded schedule shaped (students, slots), or a stack of them
+            class_durations: Dict containing class duration information, used if the GA has no codec
         Returns:
-            Mutated schedule
+            Mutated copy where each cell is swapped with a random cell with probability mutation_rate
         """
-        if not schedule:
+        if schedule.size == 0:
             return schedule
-            
-        mutated = [row[:] for row in schedule]
-        num_rows = len(schedule)
-        num_cols = len(schedule[0])
-        
-        for i in range(num_rows):
-            for j in range(num_cols):
-                if np.random.random() < self.mutation_rate:
-                    # Find another position to swap with
-                    i2 = np.random.randint(0, num_rows)
-                    j2 = np.random.randint(0, num_cols)
-                    
-                    # Skip if trying to modify second hour of 2-hour class
-                    if j > 0 and mutated[i][j] == mutated[i][j-1]:
-                        continue
-                    if j2 > 0 and mutated[i2][j2] == mutated[i2][j2-1]:
-                        continue
-                    
-                    # Check if it's a 2-hour class
-                    is_two_hour = False
-                    if j + 1 < num_cols and mutated[i][j] == mutated[i][j+1]:
-                        is_two_hour = True
-                    
-                    # Perform swap
-                    mutated[i][j], mutated[i2][j2] = mutated[i2][j2], mutated[i][j]
-                    
-                    # Handle second hour of 2-hour classes
-                    if is_two_hour and j + 1 < num_cols and j2 + 1 < num_cols:
-                        mutated[i][j+1], mutated[i2][j2+1] = mutated[i2][j2+1], mutated[i][j+1]
-        
-        return mutated
+        codec = self._get_codec(class_durations)
+        mutated = codec.expand(schedule).reshape((-1,) + schedule.shape[-2:])
+        num_schedules, num_rows, num_cols = mutated.shape
+
+        # Swaps within one schedule happen in row-major order; each round makes the next swap
+        # of every schedule at once
+        hits = self.random.random(mutated.shape) < self.mutation_rate
+        owners, rows, cols = np.nonzero(hits)
+        counts = np.bincount(owners, minlength=num_schedules)
+        rank = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+        for round_number in range(counts.max(initial=0)):
+            current = rank == round_number
+            n, i, j = owners[current], rows[current], cols[current]
+            i2 = self.random.randint(0, num_rows, size=len(n))
+            j2 = self.random.randint(0, num_cols, size=len(n))
+
+            # Skip the second hour of a 2-hour class at either end of the swap
+            keep = ~((j > 0) & (mutated[n, i, j] == mutated[n, i, np.maximum(j - 1, 0)]))
+            keep &= ~((j2 > 0) & (mutated[n, i2, j2] == mutated[n, i2, np.maximum(j2 - 1, 0)]))
+            n, i, j, i2, j2 = n[keep], i[keep], j[keep], i2[keep], j2[keep]
+            next_j = np.minimum(j + 1, num_cols - 1)
+            is_two_hour = (j + 1 < num_cols) & (mutated[n, i, j] == mutated[n, i, next_j])
+
+            mutated[n, i, j], mutated[n, i2, j2] = mutated[n, i2, j2], mutated[n, i, j]
 
-    def evolve_population(self, population: List[List[List[str]]], 
+            # Move the second hour of a 2-hour class along with it
+            pair = is_two_hour & (j2 + 1 < num_cols)
+            n, i, j, i2, j2 = n[pair], i[pair], j[pair] + 1, i2[pair], j2[pair] + 1
+            mutated[n, i, j], mutated[n, i2, j2] = mutated[n, i2, j2], mutated[n, i, j]
+
+        return codec.compress(mutated.reshape(schedule.shape))
+
+    def evolve_population(self, population: np.ndarray,
                          fitness_scores: List[float],
-                         class_durations: Dict[str, Dict[str, int]]) -> List[List[List[str]]]:
+                         class_durations: Dict[str, Dict[str, int]] = None) -> np.ndarray:
         """
         Create next generation of schedules
         Args:
-            population: Current population
+            population: Encoded schedules shaped (population, students, slots)
             fitness_scores: List of fitness scores
-            class_durations: Dict containing class duration information
+            class_durations: Dict containing class duration information, used if the GA has no codec
         Returns:
             New population
         """
-        if not population or not fitness_scores:
+        if len(population) == 0 or len(fitness_scores) == 0:
             return population
-            
-        new_population = []
-        
+        population = np.asarray(population)
+
         # Elitism - keep best schedule
         best_idx = np.argmax(fitness_scores)
-        new_population.append(population[best_idx])
-        
-        # Create rest of new population
-        while len(new_population) < self.population_size:
-            # Tournament selection
-            parent1 = self.tournament_select(population, fitness_scores)
-            parent2 = self.tournament_select(population, fitness_scores)
-            
-            # Crossover
-            child = self.crossover(parent1, parent2, class_durations)
-            
-            # Mutation
-            child = self.mutate(child)
-            
-            new_population.append(child)
-        
+        elite = population[best_idx:best_idx + 1]
+
+        # Create rest of new population: tournaments, crossover and mutation for all children at once
+        num_children = max(self.population_size - 1, 0)
+        parents1 = population[self._select_indices(fitness_scores, num_children)]
+        parents2 = population[self._select_indices(fitness_scores, num_children)]
+        children = self.mutate(self.crossover(parents1, parents2, class_durations), class_durations)
+
         self.current_generation += 1
-        return new_population
\ No newline at end of file
+        return np.concatenate((elite, children))
\ No newline at end of file
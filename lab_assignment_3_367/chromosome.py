@@ -0,0 +1,79 @@
+from typing import List, Dict
+import numpy as np
+
+EMPTY = 0  # Code of a free slot
+CONTINUATION = -1  # Code of a cell that repeats the cell before it, e.g. the second hour of a 2-hour class
+
+
+class ScheduleCodec:
+    def __init__(self, classes: Dict[str, Dict[str, int]]):
+        """
+        Build the integer encoding for a set of classes
+        Args:
+            classes: Dict mapping class name to its 'duration' and 'priority'
+        """
+        # Code k > 0 stands for the cell string of the k-th class, e.g. 'P1 2h'
+        self.cells = [''] + [f"{name} {info['duration']}h" for name, info in classes.items()]
+        if len(self.cells) > np.iinfo(np.int8).max:
+            raise ValueError(f"At most {np.iinfo(np.int8).max - 1} classes fit in an int8 code")
+        self.codes = {cell: code for code, cell in enumerate(self.cells)}
+        self.durations = np.array([0] + [info['duration'] for info in classes.values()], dtype=np.int8)
+        # Priority digit as calculate_fitness reads it from the class name (P1 -> 1), -1 if none
+        self.priorities = np.full(len(self.cells), -1, dtype=np.int8)
+        for code, name in enumerate(classes, start=1):
+            try:
+                self.priorities[code] = int(name[1])
+            except (IndexError, ValueError):
+                pass
+
+    def encode(self, schedule: List[List[str]]) -> np.ndarray:
+        """
+        Convert a schedule of cell strings to codes
+        Args:
+            schedule: 2D list of class assignments such as 'P1 2h'
+        Returns:
+            int8 array of shape (students, slots)
+        """
+        try:
+            values = np.array([[self.codes[cell] for cell in row] for row in schedule], dtype=np.int8)
+        except KeyError as error:
+            raise ValueError(f"Unknown class assignment {error.args[0]!r}") from None
+        return self.compress(values.reshape(len(schedule), -1))
+
+    def decode(self, schedule: np.ndarray) -> List[List[str]]:
+        """
+        Convert codes back to a schedule of cell strings
+        Args:
+            schedule: int8 array of shape (students, slots)
+        Returns:
+            2D list of class assignments
+        """
+        return [[self.cells[value] for value in row] for row in self.expand(schedule).tolist()]
+
+    def expand(self, schedule: np.ndarray) -> np.ndarray:
+        """
+        Replace every continuation marker with the code of the cell it continues
+        Args:
+            schedule: Codes shaped (..., slots); a row never starts with a continuation
+        Returns:
+            Array of the same shape holding only class codes and EMPTY
+        """
+        schedule = np.asarray(schedule)
+        slots = np.arange(schedule.shape[-1])
+        # Index of the last cell at or before each cell that is not a continuation
+        source = np.maximum.accumulate(np.where(schedule != CONTINUATION, slots, 0), axis=-1)
+        return np.take_along_axis(schedule, source, axis=-1)
+
+    def compress(self, values: np.ndarray) -> np.ndarray:
+        """
+        Mark every occupied cell equal to the cell before it as a continuation
+        Args:
+            values: Class codes shaped (..., slots), without continuation markers
+        Returns:
+            int8 codes of the same shape
+        """
+        values = np.asarray(values)
+        codes = values.astype(np.int8)
+        repeats = (values[..., 1:] == values[..., :-1]) & (values[..., 1:] != EMPTY)
+        codes[..., 1:][repeats] = CONTINUATION
+        return codes
@@ -0,0 +1,115 @@
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Hashable, List
+import numpy as np
+from chromosome import ScheduleCodec
+
+FITNESS_CACHE_SIZE = 4096  # Schedules whose fitness is kept before the least recently used is evicted
+
+
+def problem_fingerprint(student_preferences: Dict[int, float], student_availability: Dict[int, List[bool]],
+                        codec: ScheduleCodec, shape: tuple) -> int:
+    """
+    Hash everything besides the schedule that fitness depends on
+    Args:
+        student_preferences: Dict mapping student ID to preference value
+        student_availability: Dict mapping student ID to list of available slots
+        codec: Encoding the schedules use, None for cell strings
+        shape: Shape of one schedule, (students, slots)
+    Returns:
+        64-bit fingerprint, equal for equal problem instances
+    """
+    cells = tuple(codec.cells) if codec is not None else ()
+    availability = sorted((student, tuple(bool(slot) for slot in slots))
+                          for student, slots in student_availability.items())
+    problem = (tuple(shape), cells, sorted(student_preferences.items()), availability)
+    return int.from_bytes(hashlib.blake2b(repr(problem).encode(), digest_size=8).digest(), 'little')
+
+
+class FitnessCache:
+    def __init__(self, capacity: int = FITNESS_CACHE_SIZE):
+        """
+        Bounded least-recently-used cache of fitness scores
+        Args:
+            capacity: Entries kept before the least recently used one is evicted
+        """
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable, default: float = None) -> float:
+        """Return the fitness stored under key and mark it most recently used, or default"""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: float):
+        """Store a fitness under key, evicting the least recently used entries beyond capacity"""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits, 0.0 before the first lookup"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def evaluate(self, ga, population: np.ndarray, student_preferences: Dict[int, float],
+                 student_availability: Dict[int, List[bool]], problem: int = None) -> np.ndarray:
+        """
+        Score a population, computing only schedules not seen before
+        Args:
+            ga: GeneticAlgorithm whose codec encodes the population
+            population: Encoded schedules shaped (population, students, slots)
+            student_preferences: Dict mapping student ID to preference value
+            student_availability: Dict mapping student ID to list of available slots
+            problem: problem_fingerprint of this problem, computed once by the caller;
+                computed here when None, which costs more than a small population's lookups
+        Returns:
+            Array of fitness scores, equal to ga.calculate_fitness_batch on the population
+        """
+        population = np.ascontiguousarray(population)
+        if problem is None:
+            problem = problem_fingerprint(student_preferences, student_availability, ga.codec, population.shape[1:])
+        # A schedule's key is its raw bytes, which the dict hashes and compares exactly
+        keys = [(problem, schedule.tobytes()) for schedule in population]
+
+        fitness = np.empty(len(population))
+        pending = {}  # Key of each uncached schedule -> its positions in the population
+        for k, key in enumerate(keys):
+            if key in pending:
+                # The same child bred twice in one generation is only scored once
+                pending[key].append(k)
+                self.hits += 1
+                continue
+            value = self.get(key)
+            if value is None:
+                pending[key] = [k]
+            else:
+                fitness[k] = value
+        if pending:
+            first = [positions[0] for positions in pending.values()]
+            scores = ga.calculate_fitness_batch(population[first], student_preferences, student_availability)
+            for (key, positions), score in zip(pending.items(), scores.tolist()):
+                fitness[positions] = score
+                self.put(key, score)
+        return fitness
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"size": len(self.entries), "capacity": self.capacity, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hit_rate}
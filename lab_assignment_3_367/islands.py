@@ -0,0 +1,293 @@
+import multiprocessing
+import os
+import time
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+import numpy as np
+from agen import GeneticAlgorithm
+from chromosome import ScheduleCodec
+
+MIGRATION_INTERVAL = 10  # Generations each island evolves between migrations
+MIGRANT_COUNT = 2  # Best schedules an island sends to each of its neighbours per migration
+MIN_MUTATION_RATE = 0.01  # Floor of the decaying mutation rate, as in ScheduleOptimizer
+TOPOLOGIES = ('ring', 'complete', 'star')
+
+
+def migration_sources(topology: Union[str, Sequence[Sequence[int]]], num_islands: int) -> List[List[int]]:
+    """
+    List where each island's immigrants come from
+    Args:
+        topology: 'ring' (each island sends to the next), 'complete' (to every other island),
+            'star' (island 0 exchanges with every other island), or explicit source lists
+        num_islands: Number of islands
+    Returns:
+        For each island, the islands it receives migrants from
+    """
+    islands = range(num_islands)
+    if not isinstance(topology, str):
+        sources = [sorted(set(int(source) for source in island_sources)) for island_sources in topology]
+        if len(sources) != num_islands or any(not 0 <= source < num_islands
+                                              for island_sources in sources for source in island_sources):
+            raise ValueError(f"Topology must list source islands in range({num_islands}) for each island")
+        return sources
+    if topology == 'ring':
+        return [[(i - 1) % num_islands] if num_islands > 1 else [] for i in islands]
+    if topology == 'complete':
+        return [[j for j in islands if j != i] for i in islands]
+    if topology == 'star':
+        return [list(range(1, num_islands)) if i == 0 else [0] for i in islands]
+    raise ValueError(f"Unknown topology {topology!r}, expected one of {TOPOLOGIES}")
+
+
+class Island:
+    def __init__(self, index: int, population: np.ndarray, codec: ScheduleCodec,
+                 student_preferences: Dict[int, float], student_availability: Dict[int, List[bool]],
+                 mutation_rate: float, num_generations: int, random_state: np.random.RandomState):
+        """
+        One GA population with its own random stream, run in a worker process or in-process
+        Args:
+            index: Position of the island in the topology
+            population: Initial encoded schedules shaped (population, students, slots)
+            codec: Encoding of the schedules
+            student_preferences: Dict mapping student ID to preference value
+            student_availability: Dict mapping student ID to list of available slots
+            mutation_rate: Initial mutation rate, decayed over num_generations
+            num_generations: Generations of the whole run
+            random_state: Random stream of this island
+        """
+        self.index = index
+        self.student_preferences = student_preferences
+        self.student_availability = student_availability
+        self.mutation_rate = mutation_rate
+        self.num_generations = num_generations
+        self.ga = GeneticAlgorithm(len(population), mutation_rate, codec, random_state)
+        self.population = population
+        self.fitness = self._evaluate(population)
+        self.generation = 0
+        self.evaluations = len(population)
+
+    def _evaluate(self, population: np.ndarray) -> np.ndarray:
+        return self.ga.calculate_fitness_batch(population, self.student_preferences, self.student_availability)
+
+    def immigrate(self, schedules: np.ndarray, fitness: np.ndarray):
+        """
+        Replace the worst schedules with immigrants, never the current best
+        Args:
+            schedules: Encoded immigrant schedules
+            fitness: Their fitness scores
+        """
+        best_idx = int(np.argmax(self.fitness))
+        worst = [k for k in np.argsort(self.fitness, kind='stable').tolist() if k != best_idx]
+        count = min(len(schedules), len(worst))
+        if count:
+            self.population = self.population.copy()
+            self.population[worst[:count]] = schedules[:count]
+            self.fitness = self.fitness.copy()
+            self.fitness[worst[:count]] = fitness[:count]
+
+    def evolve(self, generations: int) -> Dict:
+        """
+        Evolve for a number of generations
+        Args:
+            generations: Generations to run
+        Returns:
+            Summary with the island's population, fitness and best fitness of each generation run
+        """
+        history = []
+        for _ in range(generations):
+            # Same decaying mutation rate as the single-population optimizer
+            self.ga.mutation_rate = max(MIN_MUTATION_RATE,
+                                        self.mutation_rate * (1 - self.generation / self.num_generations))
+            self.population = self.ga.evolve_population(self.population, self.fitness.tolist())
+            self.fitness = self._evaluate(self.population)
+            self.evaluations += len(self.population)
+            self.generation += 1
+            history.append(float(self.fitness.max()))
+        return {'index': self.index, 'generation': self.generation, 'population': self.population,
+                'fitness': self.fitness, 'history': history, 'evaluations': self.evaluations}
+
+    def step(self, immigrants: Tuple[np.ndarray, np.ndarray], generations: int) -> Dict:
+        """Take in immigrants, if any, then evolve for generations"""
+        if immigrants is not None:
+            self.immigrate(*immigrants)
+        return self.evolve(generations)
+
+
+def _run_island(connection, island: Island):
+    """Worker process loop: answer each (immigrants, generations) message with a summary until None"""
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        try:
+            connection.send(island.step(*message))
+        except Exception as e:
+            connection.send(e)
+    connection.close()
+
+
+class IslandModel:
+    def __init__(self, env, num_islands: int = None, population_size: int = 50, mutation_rate: float = 0.1,
+                 num_generations: int = 100, migration_interval: int = MIGRATION_INTERVAL,
+                 migrant_count: int = MIGRANT_COUNT, topology: Union[str, Sequence[Sequence[int]]] = 'ring',
+                 seed: int = None, processes: bool = True):
+        """
+        Island-model GA: several populations evolve apart and swap their best schedules
+        Args:
+            env: Environment defining the scheduling problem
+            num_islands: Number of populations; one per CPU core when None
+            population_size: Schedules per island
+            mutation_rate: Initial mutation rate of every island
+            num_generations: Generations each island runs, counting the initial one
+            migration_interval: Generations between migrations
+            migrant_count: Best schedules sent along each edge of the topology per migration
+            topology: Migration topology, see migration_sources
+            seed: Seed of the whole run; the same seed and settings give the same result
+                whether islands run in processes or not. A fresh seed is drawn when None
+            processes: Run each island in its own worker process, else all in this one
+        """
+        self.env = env
+        self.num_islands = max(1, num_islands or os.cpu_count() or 1)
+        self.population_size = population_size
+        self.mutation_rate = mutation_rate
+        self.num_generations = num_generations
+        self.migration_interval = max(1, migration_interval)
+        self.migrant_count = migrant_count
+        self.sources = migration_sources(topology, self.num_islands)
+        seed_sequence = np.random.SeedSequence(seed)
+        self.seed = seed_sequence.entropy  # Pass back as seed to repeat the run
+        self.island_seeds = [int(child.generate_state(1)[0]) for child in seed_sequence.spawn(self.num_islands)]
+        self.processes = processes
+
+        # Logging setup
+        self.fitness_history = []  # Best fitness over all islands per generation
+        self.island_histories = [[] for _ in range(self.num_islands)]
+        self.best_schedule = None
+        self.best_fitness = 0.0
+        self.current_schedule = None  # Best schedule of the latest generation
+        self.current_fitness = 0.0
+        self.population = None  # Best schedules of all islands after run(), best first
+        self.population_fitness = None
+        self.evaluations = 0
+        self.elapsed = 0.0
+
+    def _create_islands(self) -> List[Island]:
+        islands = []
+        for index, island_seed in enumerate(self.island_seeds):
+            random_state = np.random.RandomState(island_seed)
+            population = np.stack([self.env.generate_random_schedule(random_state)
+                                   for _ in range(self.population_size)])
+            islands.append(Island(index, population, self.env.codec, self.env.student_preferences,
+                                  self.env.student_availability, self.mutation_rate, self.num_generations,
+                                  random_state))
+        return islands
+
+    def _migrants(self, summaries: List[Dict]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Collect each island's immigrants: the best schedules of its sources, in source order"""
+        if self.migrant_count <= 0:
+            return [None] * self.num_islands
+        emigrants = []
+        for summary in summaries:
+            best = np.argsort(-summary['fitness'], kind='stable')[:self.migrant_count]
+            emigrants.append((summary['population'][best], summary['fitness'][best]))
+        migrants = []
+        for sources in self.sources:
+            if not sources:
+                migrants.append(None)
+                continue
+            migrants.append((np.concatenate([emigrants[source][0] for source in sources]),
+                             np.concatenate([emigrants[source][1] for source in sources])))
+        return migrants
+
+    def _record(self, summaries: List[Dict]):
+        for summary in summaries:
+            self.island_histories[summary['index']].extend(summary['history'])
+        self.fitness_history.extend(max(generation) for generation in
+                                    zip(*(summary['history'] for summary in summaries)))
+        self.evaluations = sum(summary['evaluations'] for summary in summaries)
+        # Ties go to the lower island, then the earlier schedule
+        self.current_schedule, self.current_fitness = None, 0.0
+        for summary in summaries:
+            best_idx = int(np.argmax(summary['fitness']))
+            if self.current_schedule is None or summary['fitness'][best_idx] > self.current_fitness:
+                self.current_fitness = float(summary['fitness'][best_idx])
+                self.current_schedule = summary['population'][best_idx]
+        if self.best_schedule is None or self.current_fitness > self.best_fitness:
+            self.best_fitness = self.current_fitness
+            self.best_schedule = self.current_schedule.copy()
+
+    def _merge(self, summaries: List[Dict]):
+        """Keep the population_size best schedules over all islands, best first"""
+        population = np.concatenate([summary['population'] for summary in summaries])
+        fitness = np.concatenate([summary['fitness'] for summary in summaries])
+        best = np.argsort(-fitness, kind='stable')[:self.population_size]
+        self.population = population[best]
+        self.population_fitness = fitness[best]
+
+    def run(self, callback: Callable[[int, np.ndarray, float, float], bool] = None) -> Tuple[np.ndarray, float]:
+        """
+        Evolve all islands, migrating every migration_interval generations
+        Args:
+            callback: Called before each migration and at the end with (generation, best schedule
+                of that generation, its fitness, best fitness so far); returning False stops the run
+        Returns:
+            Best schedule found on any island and its fitness
+        """
+        start_time = time.perf_counter()
+        islands = self._create_islands()
+        workers = []
+        try:
+            if self.processes and self.num_islands > 1:
+                for island in islands:
+                    parent, child = multiprocessing.Pipe()
+                    worker = multiprocessing.Process(target=_run_island, args=(child, island), daemon=True)
+                    worker.start()
+                    child.close()
+                    workers.append((worker, parent))
+
+            def step(migrants, generations):
+                if not workers:
+                    return [island.step(immigrants, generations) for island, immigrants in zip(islands, migrants)]
+                # Every island works on its generations before any result is awaited
+                for (_, connection), immigrants in zip(workers, migrants):
+                    connection.send((immigrants, generations))
+                summaries = [connection.recv() for _, connection in workers]
+                for summary in summaries:
+                    if isinstance(summary, Exception):
+                        raise summary
+                return summaries
+
+            # The initial populations count as generation 0
+            summaries = step([None] * self.num_islands, 0)
+            for summary in summaries:
+                summary['history'] = [float(summary['fitness'].max())]
+            self._record(summaries)
+            generation = 1
+            while True:
+                if callback is not None and callback(generation - 1, self.current_schedule, self.current_fitness,
+                                                     self.best_fitness) is False:
+                    break
+                if generation >= self.num_generations:
+                    break
+                generations = min(self.migration_interval, self.num_generations - generation)
+                migrants = self._migrants(summaries) if generation > 1 else [None] * self.num_islands
+                summaries = step(migrants, generations)
+                self._record(summaries)
+                generation += generations
+            self._merge(summaries)
+        finally:
+            for worker, connection in workers:
+                try:
+                    connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                worker.join(timeout=1.0)
+                if worker.is_alive():
+                    worker.terminate()
+                connection.close()
+            self.elapsed = time.perf_counter() - start_time
+        return self.best_schedule, self.best_fitness
+
+    @property
+    def evaluations_per_second(self) -> float:
+        """Fitness evaluations over all islands per second of the last run"""
+        return self.evaluations / self.elapsed if self.elapsed else 0.0
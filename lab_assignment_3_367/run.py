@@ -1,58 +1,111 @@
-import time
-import pygame
+import argparse
 import matplotlib.pyplot as plt
 from environment import Environment
-from agent import GeneticAlgorithm
+from agen import GeneticAlgorithm
+from islands import IslandModel
+from fitnesscache import FitnessCache, FITNESS_CACHE_SIZE, problem_fingerprint
 import numpy as np
 
 class ScheduleOptimizer:
-    def __init__(self):
+    def __init__(self, headless: bool = False, num_islands: int = 1, seed: int = None):
+        """
+        Set up the problem and the GA
+        Args:
+            headless: Run without opening a window, e.g. on a server without a display
+            num_islands: Populations evolved in parallel, 1 for a single population
+            seed: Seed of the whole run, problem included; a fresh seed is drawn when None
+        """
         self.NUM_SLOTS = 8
         self.NUM_STUDENTS = 5
         self.POPULATION_SIZE = 50
         self.MUTATION_RATE = 0.1
         self.NUM_GENERATIONS = 100
-        self.DELAY = 1000
         
-        self.env = Environment(self.NUM_SLOTS, self.NUM_STUDENTS)
-        self.ga = GeneticAlgorithm(self.POPULATION_SIZE, self.MUTATION_RATE)
+        # Drawing is throttled so it does not slow the GA down; the last generation is always drawn
+        self.HEADLESS = headless
+        self.RENDER_EVERY = 5
+        self.MAX_FPS = 10
+        
+        # Island model: NUM_ISLANDS populations in worker processes, 1 for a single population
+        self.NUM_ISLANDS = num_islands
+        self.MIGRATION_INTERVAL = 10
+        self.MIGRANT_COUNT = 2
+        self.TOPOLOGY = 'ring'
+        
+        # The printed seed reproduces the problem and every GA draw; islands spawn their own streams from it
+        seed_sequence = np.random.SeedSequence(seed)
+        self.SEED = seed_sequence.entropy
+        problem_seed, ga_seed = seed_sequence.generate_state(2)
+        self.random = np.random.RandomState(ga_seed)
+        
+        self.env = Environment(self.NUM_SLOTS, self.NUM_STUDENTS, np.random.RandomState(problem_seed))
+        self.ga = GeneticAlgorithm(self.POPULATION_SIZE, self.MUTATION_RATE, self.env.codec, self.random)
+        # Optional cache scoring elites and duplicate children once. Off by default: at these sizes
+        # calculate_fitness_batch is cheaper than the lookups, so it only pays off for costlier fitness
+        self.USE_FITNESS_CACHE = False
+        self.FITNESS_CACHE_SIZE = FITNESS_CACHE_SIZE
+        self.fitness_cache = FitnessCache(self.FITNESS_CACHE_SIZE)
+        self.problem_key = problem_fingerprint(self.env.student_preferences, self.env.student_availability,
+                                               self.env.codec, (self.NUM_STUDENTS, self.NUM_SLOTS))
         
         # Logging setup
         self.fitness_history = []
         self.best_schedule = None
         self.best_fitness = 0.0
+        self.viewer = None
+
+    def _open_viewer(self):
+        """Open the schedule window unless running headless"""
+        if not self.HEADLESS and self.viewer is None:
+            from viewer import ScheduleViewer  # Only drawing needs pygame
+            self.viewer = ScheduleViewer(self.env, self.RENDER_EVERY, self.MAX_FPS)
+        return self.viewer
+
+    def _close_viewer(self):
+        if self.viewer is not None:
+            self.viewer.close()
+            self.viewer = None
 
     def optimize(self):
         """Main optimization loop with enhanced features"""
+        if self.NUM_ISLANDS > 1:
+            return self.optimize_islands()
         try:
-            # Initialize population
-            population = [self.env.generate_random_schedule() 
-                         for _ in range(self.POPULATION_SIZE)]
+            # Initialize population as one (population, students, slots) int8 array
+            population = np.stack([self.env.generate_random_schedule(self.random)
+                                   for _ in range(self.POPULATION_SIZE)])
             
             generation = 0
             running = True
+            viewer = self._open_viewer()
             
             while running and generation < self.NUM_GENERATIONS:
                 # Handle Pygame events
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running = False
-                        break
+                if viewer is not None and not viewer.handle_events():
+                    running = False
+                    break
                 
                 try:
                     # Dynamic mutation rate adjustment
                     self.ga.mutation_rate = max(0.01, 
                         self.MUTATION_RATE * (1 - generation/self.NUM_GENERATIONS))
                     
-                    # Evaluate population
-                    fitness_scores = []
-                    for schedule in population:
-                        fitness = self.ga.calculate_fitness(
-                            schedule, 
+                    # Evaluate the whole population in one vectorized pass, or only the
+                    # schedules not scored before when the cache is on
+                    if self.USE_FITNESS_CACHE:
+                        fitness_scores = self.fitness_cache.evaluate(
+                            self.ga,
+                            population,
+                            self.env.student_preferences,
+                            self.env.student_availability,
+                            self.problem_key
+                        ).tolist()
+                    else:
+                        fitness_scores = self.ga.calculate_fitness_batch(
+                            population,
                             self.env.student_preferences,
                             self.env.student_availability
-                        )
-                        fitness_scores.append(fitness)
+                        ).tolist()
                     
                     # Update best schedule
                     best_idx = np.argmax(fitness_scores)
@@ -60,18 +113,20 @@ class ScheduleOptimizer:
                     
                     if current_best_fitness > self.best_fitness:
                         self.best_fitness = current_best_fitness
-                        self.best_schedule = population[best_idx]
+                        self.best_schedule = population[best_idx].copy()
                     
                     # Log fitness
                     self.fitness_history.append(current_best_fitness)
                     
-                    # Visualize current best schedule
-                    self.env.visualize_schedule(
-                        population[best_idx],
-                        generation,
-                        current_best_fitness,
-                        self.best_fitness
-                    )
+                    # Visualize current best schedule, skipping throttled frames
+                    if viewer is not None:
+                        viewer.update(
+                            population[best_idx],
+                            generation,
+                            current_best_fitness,
+                            self.best_fitness,
+                            force=generation == self.NUM_GENERATIONS - 1
+                        )
                     
                     # Create new generation
                     new_population = self.ga.evolve_population(
@@ -83,11 +138,15 @@ class ScheduleOptimizer:
                     population = new_population
                     generation += 1
                     
-                    time.sleep(self.DELAY / 1000)
-                    
                 except Exception as e:
                     print(f"Error during generation {generation}: {str(e)}")
                     continue
+            
+            print(f"Seed {self.SEED}: best fitness {self.best_fitness:.2f}")
+            if self.USE_FITNESS_CACHE:
+                cache = self.fitness_cache
+                print(f"Fitness cache: {cache.hits} hits, {cache.misses} misses "
+                      f"({cache.hit_rate:.0%} hit rate), {cache.evictions} evictions")
                     
         except KeyboardInterrupt:
             print("\nOptimization interrupted by user")
@@ -95,6 +154,35 @@ class ScheduleOptimizer:
             print(f"Fatal error: {str(e)}")
         finally:
             self.plot_fitness_history()
+            self._close_viewer()
+            self.env.cleanup()
+
+    def optimize_islands(self):
+        """Evolve NUM_ISLANDS populations in parallel, showing the best schedule after each migration"""
+        islands = IslandModel(self.env, self.NUM_ISLANDS, self.POPULATION_SIZE, self.MUTATION_RATE,
+                              self.NUM_GENERATIONS, self.MIGRATION_INTERVAL, self.MIGRANT_COUNT,
+                              self.TOPOLOGY, self.SEED)
+
+        def show(generation, schedule, current_fitness, best_fitness):
+            if not viewer.handle_events():
+                return False
+            viewer.update(schedule, generation, current_fitness, best_fitness,
+                          force=generation == self.NUM_GENERATIONS - 1)
+            return True
+
+        try:
+            viewer = self._open_viewer()
+            self.best_schedule, self.best_fitness = islands.run(show if viewer is not None else None)
+            print(f"Seed {islands.seed}: best fitness {self.best_fitness:.2f}, "
+                  f"{islands.evaluations_per_second:.0f} evaluations/s on {islands.num_islands} islands")
+        except KeyboardInterrupt:
+            print("\nOptimization interrupted by user")
+        except Exception as e:
+            print(f"Fatal error: {str(e)}")
+        finally:
+            self.fitness_history = islands.fitness_history
+            self.plot_fitness_history()
+            self._close_viewer()
             self.env.cleanup()
 
     def plot_fitness_history(self):
@@ -112,5 +200,17 @@ class ScheduleOptimizer:
             print(f"Error plotting fitness history: {str(e)}")
 
 if __name__ == "__main__":
-    optimizer = ScheduleOptimizer()
+    parser = argparse.ArgumentParser(description="Optimize class schedules with a genetic algorithm.")
+    parser.add_argument("--headless", action="store_true", help="Run without a window, at full speed")
+    parser.add_argument("--render-every", type=int, default=5, help="Draw every this many generations")
+    parser.add_argument("--max-fps", type=float, default=10, help="Most frames drawn per second")
+    parser.add_argument("--fitness-cache", action="store_true", help="Cache fitness scores of repeated schedules")
+    parser.add_argument("--islands", type=int, default=1, help="Populations evolved in parallel")
+    parser.add_argument("--seed", type=int, default=None, help="Seed printed by an earlier run, to repeat it")
+    args = parser.parse_args()
+    
+    optimizer = ScheduleOptimizer(headless=args.headless, num_islands=args.islands, seed=args.seed)
+    optimizer.RENDER_EVERY = args.render_every
+    optimizer.MAX_FPS = args.max_fps
+    optimizer.USE_FITNESS_CACHE = args.fitness_cache
     optimizer.optimize()
\ No newline at end of file
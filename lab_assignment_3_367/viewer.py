@@ -0,0 +1,190 @@
+import time
+import pygame
+import numpy as np
+
+RENDER_EVERY = 5  # Draw every this many generations
+MAX_FPS = 10  # Most frames drawn per second
+
+
+class ScheduleViewer:
+    def __init__(self, env, render_every: int = RENDER_EVERY, max_fps: float = MAX_FPS):
+        """
+        Pygame window showing the schedules of an Environment, throttled by update()
+        Args:
+            env: Environment whose students, slots and availability are drawn
+            render_every: Draw only generations divisible by this, or every one when None
+            max_fps: Draw at most this many frames per second, or without limit when None
+        """
+        self.env = env
+        self.render_every = render_every
+        self.max_fps = max_fps
+        self.last_frame = None  # perf_counter() time of the last frame drawn
+        self.frames = 0
+
+        # Initialize Pygame with improved settings
+        pygame.init()
+        self.width = 1270
+        self.height = 550
+        self.screen = pygame.display.set_mode((self.width, self.height))
+        pygame.display.set_caption("Class Schedule Optimization")
+        
+        # Enhanced color scheme
+        self.WHITE = (255, 255, 255)
+        self.BLACK = (0, 0, 0)
+        self.BLUE = (66, 133, 244)
+        self.LIGHT_GRAY = (245, 245, 245)
+        self.DARK_GRAY = (108, 117, 125)
+        self.HEADER_BG = (52, 73, 94)
+        self.CONFLICT_COLOR = (255, 99, 71)  # Red for conflicts
+        
+        # Grid properties
+        self.grid_width = min(900, self.width - 300)
+        self.cell_width = self.grid_width // env.num_slots
+        self.cell_height = 60
+        self.grid_start_x = 200
+        self.grid_start_y = 100
+        
+        # Font setup
+        self.title_font = pygame.font.SysFont('Arial', 28, bold=True)
+        self.header_font = pygame.font.SysFont('Arial', 18, bold=True)
+        self.cell_font = pygame.font.SysFont('Arial', 16)
+        self.info_font = pygame.font.SysFont('Arial', 18)
+        self.preference_font = pygame.font.SysFont('Arial', 16)
+
+    def draw_rounded_rect(self, surface, rect, color, radius=10):
+        """Draw a rounded rectangle"""
+        pygame.draw.rect(surface, color, rect, border_radius=radius)
+
+    def handle_events(self) -> bool:
+        """Process window events; return False once the window was closed"""
+        running = True
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        return running
+
+    def update(self, schedule: np.ndarray, generation: int, current_fitness: float, max_fitness: float,
+               force: bool = False) -> bool:
+        """
+        Draw the schedule unless this generation or frame rate is throttled
+        Args:
+            schedule: Encoded schedule or 2D list of class assignments
+            generation: Generation number shown and checked against render_every
+            current_fitness: Fitness of the schedule
+            max_fitness: Best fitness so far
+            force: Draw regardless of the throttling, e.g. for the final generation
+        Returns:
+            True if a frame was drawn
+        """
+        now = time.perf_counter()
+        if not force:
+            if self.render_every and generation % self.render_every:
+                return False
+            if self.max_fps and self.last_frame is not None and now - self.last_frame < 1.0 / self.max_fps:
+                return False
+        self.draw(schedule, generation, current_fitness, max_fitness)
+        self.last_frame = now
+        self.frames += 1
+        return True
+
+    def draw(self, schedule: np.ndarray, generation: int,
+             current_fitness: float, max_fitness: float):
+        """Visualize the schedule with improved layout"""
+        if isinstance(schedule, np.ndarray):
+            schedule = self.env.codec.decode(schedule)
+        self.screen.fill(self.WHITE)
+        
+        # Draw title
+        title = self.title_font.render("Class Schedule Optimization", True, self.BLACK)
+        title_rect = title.get_rect(centerx=self.grid_start_x + self.grid_width//2, y=30)
+        self.screen.blit(title, title_rect)
+        
+        # Draw slot headers
+        for i in range(self.env.num_slots):
+            x = self.grid_start_x + i * self.cell_width
+            header_rect = pygame.Rect(x, self.grid_start_y - 35, self.cell_width - 4, 30)
+            self.draw_rounded_rect(self.screen, header_rect, self.HEADER_BG)
+            
+            text = self.header_font.render(f"Slot {i+1}", True, self.WHITE)
+            text_rect = text.get_rect(center=header_rect.center)
+            self.screen.blit(text, text_rect)
+        
+        # Draw info panel
+        info_panel_x = self.grid_start_x + self.grid_width + 20
+        info_panel_y = self.grid_start_y
+        info_panel = pygame.Rect(info_panel_x, info_panel_y, 200, 100)
+        self.draw_rounded_rect(self.screen, info_panel, self.LIGHT_GRAY)
+        
+        info_texts = [
+            f"Generation: {generation}",
+            f"Current Fitness: {current_fitness:.1f}",
+            f"Best Fitness: {max_fitness:.1f}"
+        ]
+        
+        for i, text in enumerate(info_texts):
+            info_surface = self.info_font.render(text, True, self.BLACK)
+            self.screen.blit(info_surface, (info_panel_x + 10, info_panel_y + 10 + i * 30))
+        
+        # Draw grid
+        for i in range(self.env.num_students):
+            # Draw preference
+            pref_text = self.preference_font.render(
+                f"Preference: {self.env.student_preferences[i]:.2f}",
+                True, self.DARK_GRAY
+            )
+            pref_rect = pref_text.get_rect(
+                right=self.grid_start_x - 10,
+                centery=self.grid_start_y + i * self.cell_height + self.cell_height//2
+            )
+            self.screen.blit(pref_text, pref_rect)
+            
+            # Draw cells
+            for j in range(self.env.num_slots):
+                x = self.grid_start_x + j * self.cell_width
+                y = self.grid_start_y + i * self.cell_height
+                
+                cell_rect = pygame.Rect(x, y, self.cell_width - 4, self.cell_height - 4)
+                
+                # Determine cell color and style
+                cell_color = self.LIGHT_GRAY
+                text_color = self.BLACK
+                
+                # Check conflicts and availability
+                if schedule[i][j]:
+                    if not self.env.student_availability[i][j]:
+                        cell_color = self.CONFLICT_COLOR
+                    elif schedule[i][j].startswith(('P1', 'P2')):
+                        cell_color = self.BLUE
+                        text_color = self.WHITE
+                
+                # Draw cell with shadow effect
+                shadow_rect = cell_rect.copy()
+                shadow_rect.topleft = (cell_rect.x + 2, cell_rect.y + 2)
+                self.draw_rounded_rect(self.screen, shadow_rect, self.DARK_GRAY)
+                self.draw_rounded_rect(self.screen, cell_rect, cell_color)
+                
+                # Draw cell content
+                if schedule[i][j]:
+                    text = self.cell_font.render(schedule[i][j], True, text_color)
+                    text_rect = text.get_rect(center=cell_rect.center)
+                    self.screen.blit(text, text_rect)
+        
+        # Draw legend
+        legend_y = self.grid_start_y + (self.env.num_students + 0.5) * self.cell_height
+        legend_texts = [
+            "P1-P5: Class Programs",
+            "1h/2h: Duration",
+            "Blue: High Priority",
+            "Red: indicate conflicts Class Scheduling"
+
+        ]
+        
+        for i, text in enumerate(legend_texts):
+            legend_surface = self.cell_font.render(text, True, self.DARK_GRAY)
+            self.screen.blit(legend_surface, (self.grid_start_x, legend_y + i * 25))
+
+        pygame.display.flip()
+
+    def close(self):
+        """Cleanup Pygame resources"""
+        pygame.quit()